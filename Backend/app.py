@@ -1,11 +1,11 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request, UploadFile, File, Form
+from fastapi import FastAPI, Depends, HTTPException, status, Request, UploadFile, File, Form, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from sqlalchemy.orm import Session
 from fastapi.middleware.cors import CORSMiddleware
-from uuid import UUID
-from fastapi.responses import JSONResponse
-from models.base import SessionLocal, engine, Base
+from uuid import UUID, uuid4
+from fastapi.responses import JSONResponse, Response, RedirectResponse
+from models.base import SessionLocal
 from models.login import Login
 from models.class_model import Class
 from models.student import Student
@@ -25,10 +25,26 @@ import face_recognition
 import json
 import os
 import logging
-from PIL import Image
-from io import BytesIO
 import re
+import asyncio
+import tempfile
+import threading
+import time
 from auth import hash_password, verify_password, create_access_token
+from face_prototypes import compress_encodings, compress_registry, MAX_ENCODINGS_PER_IDENTITY
+from face_gallery import (FaceGallery, find_duplicate_identities, write_registry,
+                          registry_key_for, legacy_slot_renames, reported_identifier, LEGACY_SLOT_PATTERN,
+                          FACE_MATCH_TOLERANCE)
+from video_ingest import process_video
+from reembed import rebuild_registry
+from profile_cache import IdentityProfileCache, student_profile, student_key, staff_key
+from listing_cache import ListingCache
+from fast_json import dump_rows
+from schemas import StudentOut, StaffBase, StaffOut, student_out_columns, staff_out_columns
+from load_control import DegradationController
+from camera_scheduler import CameraScheduler
+from image_store import create_image_store, DIGEST_PATTERN, THUMBNAIL_SIZES, sniff_media_type
+from starlette.concurrency import run_in_threadpool
 
 app = FastAPI(title="Auth API")
 origins = [
@@ -43,6 +59,12 @@ images_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'face-imag
 os.makedirs(images_path, exist_ok=True)
 face_registry_path = os.path.join(images_path, 'face_registry.json')
 
+# Content-addressed face photos; older stu_<id>.jpg files are imported once
+face_image_store = create_image_store(images_path)
+legacy_image_count = face_image_store.import_legacy(images_path)
+if legacy_image_count:
+    logger.info(f"Imported {legacy_image_count} legacy face images into the image store")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,              # Allowed origins
@@ -51,10 +73,13 @@ app.add_middleware(
     allow_headers=["*"],                # Allow all headers
 )
 
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic migrations: run `alembic upgrade head` before starting
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Serialized organization/department/class listings, invalidated by their write endpoints
+listing_cache = ListingCache()
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -138,29 +163,6 @@ class StudentUpdate(BaseModel):
     class Config:
         orm_mode = True
 
-class StudentOut(BaseModel):
-    id: UUID
-    roll_number: str
-    full_name: str
-    email: str
-    phone: Optional[str]
-    department_id: Optional[UUID]
-    class_id: Optional[UUID]
-    semester: Optional[str]
-    course: Optional[str]
-    address: Optional[str]
-    date_of_birth: Optional[date]
-    gender: Optional[str]
-    created_at: Optional[date]
-    organization_id: UUID
-
-    # # Nested relationships
-    # departments: Optional[DepartmentOut]
-    # classes: Optional[ClassOut]
-
-    class Config:
-        orm_mode = True
-        
 class DepartmentOut(BaseModel):
     id: UUID
     name: str
@@ -175,22 +177,6 @@ class ClassOut(BaseModel):
     class Config:
         orm_mode = True
         
-class StaffBase(BaseModel):
-    employee_id: str
-    full_name: str
-    email: str
-    phone: Optional[str] = None
-    department_id: Optional[UUID] = None
-    role: Optional[str] = None
-    designation: Optional[str] = None
-    qualification: Optional[str] = None
-    experience: Optional[float] = None
-    address: Optional[str] = None
-    date_of_birth: Optional[date] = None
-    gender: Optional[str] = None
-    joining_date: Optional[date] = None
-    organization_id: UUID
-
 class StaffCreate(StaffBase):
     pass
 
@@ -208,11 +194,6 @@ class StaffUpdate(BaseModel):
     gender: Optional[str] = None
     joining_date: Optional[date] = None
 
-class StaffOut(StaffBase):
-    id: UUID
-    class Config:
-        orm_mode = True
-        
 class DepartmentBase(BaseModel):
     name: str
     code: Optional[str] = None
@@ -249,6 +230,14 @@ class ClassOut(ClassCreate):
     id: UUID
     created_at: Optional[date] = None
     
+organization_list_adapter = TypeAdapter(List[OrganizationResponse])
+department_list_adapter = TypeAdapter(List[DepartmentOut])
+class_list_adapter = TypeAdapter(List[ClassOut])
+
+def serialize_list(adapter, rows):
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
 class StudentCreate(BaseModel):
     name: str
     reg_no: str
@@ -312,9 +301,11 @@ def get_dashboard_data(org_id: UUID, db: Session = Depends(get_db)):
     }
 
 @app.get("/organizations", response_model=List[OrganizationResponse])
-def get_organizations(db: Session = Depends(get_db)):
-    orgs = db.query(Organization).order_by(Organization.created_at.desc()).all()
-    return orgs
+def get_organizations(request: Request, db: Session = Depends(get_db)):
+    def build():
+        orgs = db.query(Organization).order_by(Organization.created_at.desc()).all()
+        return serialize_list(organization_list_adapter, orgs)
+    return listing_cache.respond(request, "organizations", build)
 
 @app.post("/organizations", response_model=OrganizationResponse)
 def create_organization(payload: OrganizationCreate, db: Session = Depends(get_db)):
@@ -322,6 +313,7 @@ def create_organization(payload: OrganizationCreate, db: Session = Depends(get_d
     db.add(org)
     db.commit()
     db.refresh(org)
+    listing_cache.bump("organizations")
     return org
 
 @app.put("/organizations/{org_id}", response_model=OrganizationResponse)
@@ -335,6 +327,7 @@ def update_organization(org_id: UUID, payload: OrganizationUpdate, db: Session =
 
     db.commit()
     db.refresh(org)
+    listing_cache.bump("organizations")
     return org
 
 @app.delete("/organizations/{org_id}")
@@ -345,11 +338,13 @@ def delete_organization(org_id: UUID, db: Session = Depends(get_db)):
 
     db.delete(org)
     db.commit()
+    listing_cache.bump("organizations", f"departments:{org_id}", f"classes:{org_id}")
     return {"detail": "Organization deleted successfully"}
 
 @app.get("/api/students/{organization_id}", response_model=List[StudentOut])
 def get_students_by_org(organization_id: UUID, db: Session = Depends(get_db)):
-    return db.query(Student).filter(Student.organization_id == organization_id).all()
+    rows = db.query(*student_out_columns).filter(Student.organization_id == organization_id).all()
+    return Response(content=dump_rows(student_out_columns, rows), media_type="application/json")
 
 @app.post("/api/students", response_model=StudentOut)
 def create_student(student: StudentCreate, db: Session = Depends(get_db)):
@@ -359,6 +354,7 @@ def create_student(student: StudentCreate, db: Session = Depends(get_db)):
     db.add(db_student)
     db.commit()
     db.refresh(db_student)
+    profile_cache.invalidate(student_key(db_student.roll_number))
     return db_student
 
 @app.put("/api/students/{student_id}", response_model=StudentOut)
@@ -367,31 +363,43 @@ def update_student(student_id: UUID, update: StudentUpdate, db: Session = Depend
     db_student = db.query(Student).filter(Student.id == student_id).first()
     if not db_student:
         raise HTTPException(status_code=404, detail="Student not found")
+    old_roll_number = db_student.roll_number
     for key, value in update.dict(exclude_unset=True).items():
         setattr(db_student, key, value)
     db.commit()
     db.refresh(db_student)
+    profile_cache.invalidate(student_key(old_roll_number), student_key(db_student.roll_number))
     return db_student
 
 @app.delete("/api/students/{student_id}")
-def delete_student(student_id: UUID, db: Session = Depends(get_db)):
+def delete_student(student_id: UUID, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_student = db.query(Student).filter(Student.id == student_id).first()
     if not db_student:
         raise HTTPException(status_code=404, detail="Student not found")
     db.delete(db_student)
     db.commit()
+    profile_cache.invalidate(student_key(db_student.roll_number))
+    unenroll_face(student_key(db_student.roll_number), background_tasks)
     return {"message": "Student deleted"}
 
 @app.get("/api/departments/{organization_id}", response_model=List[DepartmentOut])
-def get_departments(organization_id: UUID, db: Session = Depends(get_db)):
-    return db.query(Department).filter(Department.organization_id == organization_id).all()
+def get_departments(organization_id: UUID, request: Request, db: Session = Depends(get_db)):
+    def build():
+        departments = db.query(Department).filter(Department.organization_id == organization_id).all()
+        return serialize_list(department_list_adapter, departments)
+    return listing_cache.respond(request, f"departments:{organization_id}", build)
 
 @app.get("/api/classes/{organization_id}", response_model=List[ClassOut])
-def get_classes(organization_id: UUID, db: Session = Depends(get_db)):
-    return db.query(Class).filter(Class.organization_id == organization_id).all()
+def get_classes(organization_id: UUID, request: Request, db: Session = Depends(get_db)):
+    def build():
+        classes = db.query(Class).filter(Class.organization_id == organization_id).all()
+        return serialize_list(class_list_adapter, classes)
+    return listing_cache.respond(request, f"classes:{organization_id}", build)
+
 @app.get("/api/staff/{organization_id}", response_model=List[StaffOut])
 def get_staff(organization_id: UUID, db: Session = Depends(get_db)):
-    return db.query(Staff).filter(Staff.organization_id == organization_id).all()
+    rows = db.query(*staff_out_columns).filter(Staff.organization_id == organization_id).all()
+    return Response(content=dump_rows(staff_out_columns, rows), media_type="application/json")
 
 @app.post("/api/staff", response_model=StaffOut)
 def create_staff(staff: StaffCreate, db: Session = Depends(get_db)):
@@ -399,6 +407,7 @@ def create_staff(staff: StaffCreate, db: Session = Depends(get_db)):
     db.add(db_staff)
     db.commit()
     db.refresh(db_staff)
+    profile_cache.invalidate(staff_key(db_staff.employee_id))
     return db_staff
 
 @app.put("/api/staff/{staff_id}", response_model=StaffOut)
@@ -410,15 +419,18 @@ def update_staff(staff_id: UUID, update: StaffUpdate, db: Session = Depends(get_
         setattr(db_staff, key, value)
     db.commit()
     db.refresh(db_staff)
+    profile_cache.invalidate(staff_key(db_staff.employee_id))
     return db_staff
 
 @app.delete("/api/staff/{staff_id}")
-def delete_staff(staff_id: UUID, db: Session = Depends(get_db)):
+def delete_staff(staff_id: UUID, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_staff = db.query(Staff).filter(Staff.id == staff_id).first()
     if not db_staff:
         raise HTTPException(status_code=404, detail="Staff not found")
     db.delete(db_staff)
     db.commit()
+    profile_cache.invalidate(staff_key(db_staff.employee_id))
+    unenroll_face(staff_key(db_staff.employee_id), background_tasks)
     return {"message": "Deleted successfully"}
 
 @app.get("{organization_id}", response_model=List[DepartmentOut])
@@ -431,6 +443,7 @@ def create_department(dept: DepartmentCreate, db: Session = Depends(get_db)):
     db.add(new_dept)
     db.commit()
     db.refresh(new_dept)
+    listing_cache.bump(f"departments:{new_dept.organization_id}")
     return new_dept
 
 @app.put("/api/departments/{department_id}", response_model=DepartmentOut)
@@ -438,12 +451,14 @@ def update_department(department_id: UUID, dept_data: DepartmentUpdate, db: Sess
     dept = db.query(Department).filter(Department.id == department_id).first()
     if not dept:
         raise HTTPException(status_code=404, detail="Department not found")
+    old_org_id = dept.organization_id
     
     for key, value in dept_data.dict(exclude_unset=True).items():
         setattr(dept, key, value)
 
     db.commit()
     db.refresh(dept)
+    listing_cache.bump(f"departments:{old_org_id}", f"departments:{dept.organization_id}")
     return dept
 
 @app.delete("/api/departments/{department_id}")
@@ -455,6 +470,7 @@ def delete_department(department_id: UUID, db: Session = Depends(get_db)):
     try:
         db.delete(department)
         db.commit()
+        listing_cache.bump(f"departments:{department.organization_id}")
         return {"message": "Department deleted successfully"}
     
     except IntegrityError as e:
@@ -464,17 +480,13 @@ def delete_department(department_id: UUID, db: Session = Depends(get_db)):
             detail="Department is still referenced by other records (e.g., classes)."
         )
 
-@app.get("/api/classes/{organization_id}", response_model=List[ClassOut])
-def get_classes(organization_id: UUID, db: Session = Depends(get_db)):
-    return db.query(Class).filter(Class.organization_id == organization_id).all()
-
-
 @app.post("/api/classes/", response_model=ClassOut)
 def create_class(data: ClassCreate, db: Session = Depends(get_db)):
     new_class = Class(**data.dict())
     db.add(new_class)
     db.commit()
     db.refresh(new_class)
+    listing_cache.bump(f"classes:{new_class.organization_id}")
     return new_class
 
 
@@ -483,12 +495,14 @@ def update_class(class_id: UUID, data: ClassCreate, db: Session = Depends(get_db
     class_item = db.query(Class).filter(Class.id == class_id).first()
     if not class_item:
         raise HTTPException(status_code=404, detail="Class not found")
+    old_org_id = class_item.organization_id
 
     for key, value in data.dict().items():
         setattr(class_item, key, value)
 
     db.commit()
     db.refresh(class_item)
+    listing_cache.bump(f"classes:{old_org_id}", f"classes:{class_item.organization_id}")
     return class_item
 
 
@@ -501,6 +515,7 @@ def delete_class(class_id: UUID, db: Session = Depends(get_db)):
     try:
         db.delete(class_item)
         db.commit()
+        listing_cache.bump(f"classes:{class_item.organization_id}")
         return {"message": "Class deleted successfully"}
     except Exception as e:
         db.rollback()
@@ -512,18 +527,7 @@ def get_student_by_roll(roll_number: str, db: Session = Depends(get_db)):
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    return {
-        "id": student.roll_number,
-        "name": student.full_name,
-        "type": "student",
-        "department": student.course,
-        "class": student.semester,
-        "gender": student.gender,
-        "email": student.email,
-        "phone": student.phone,
-        "dob": student.date_of_birth,
-        "address": student.address,
-    }
+    return student_profile(student)
     
 # Load known encodings from file (assumed format: { "stu_123": [[enc1], [enc2], ...], ... })
 # with open("face-images/face_registry.json", "r") as f:
@@ -542,77 +546,218 @@ if os.path.exists(face_registry_path) and os.path.getsize(face_registry_path) >
 else:
     data_dict = {}
 
+# Registries written before the per-identity cap may hold unbounded encodings
+compressed_count = compress_registry(data_dict)
+if compressed_count:
+    # Persist now; otherwise the file stays unbounded until the next enrollment
+    write_registry(face_registry_path, data_dict)
+    logger.info(f"Compressed encodings for {compressed_count} identities to at most {MAX_ENCODINGS_PER_IDENTITY} prototypes")
+
+# Keys of deleted people, masked out of matching until the next compaction
+face_tombstones_path = os.path.join(images_path, 'face_tombstones.json')
+if os.path.exists(face_tombstones_path):
+    with open(face_tombstones_path, "r") as f:
+        face_tombstones = json.load(f)
+else:
+    face_tombstones = []
+# Rewrite the registry without tombstoned keys once they make up this share of rows
+COMPACTION_DEAD_FRACTION = float(os.getenv("COMPACTION_DEAD_FRACTION", 0.2))
+
+def migrate_legacy_slot_keys():
+    """Rename stu_<roll>-<n> keys from the old student form to stu_<roll>.<n>"""
+    # The image index is checked too: import_legacy re-links old stu_<roll>-<n>.jpg files
+    candidates = [key for key in set(data_dict) | set(face_image_store.entries()) if LEGACY_SLOT_PATTERN.match(key)]
+    if not candidates:
+        return {}
+    rolls = {key[4:] for key in candidates} | {LEGACY_SLOT_PATTERN.match(key).group(1)[4:] for key in candidates}
+    db = SessionLocal()
+    try:
+        known = {row[0] for row in db.query(Student.roll_number).filter(Student.roll_number.in_(rolls))}
+    finally:
+        db.close()
+    renames = legacy_slot_renames(candidates, known)
+    for old_key, new_key in renames.items():
+        if old_key in data_dict:
+            data_dict.setdefault(new_key, []).extend(data_dict.pop(old_key))
+    face_image_store.rename(renames)
+    face_tombstones[:] = [renames.get(key, key) for key in face_tombstones]
+    return renames
+
+try:
+    renamed = migrate_legacy_slot_keys()
+    if renamed:
+        write_registry(face_registry_path, data_dict)
+        write_registry(face_tombstones_path, face_tombstones)
+        logger.info(f"Renamed {len(renamed)} legacy photo-slot keys")
+except Exception as e:
+    logger.warning(f"Could not migrate legacy photo-slot keys: {str(e)}")
+
+face_gallery = FaceGallery(data_dict, face_tombstones)
+
+# Profiles of enrolled people, so recognition can answer without a second request
+profile_cache = IdentityProfileCache(SessionLocal)
+try:
+    profile_cache.warm(data_dict.keys())
+except Exception as e:
+    logger.warning(f"Could not warm identity profile cache: {str(e)}")
+
 
 class FaceRequest(BaseModel):
     image: str  # base64 encoded
+    include_profile: bool = False  # embed the matched person's profile in the response
+
+# Steps recognition quality down under load so latency stays near the SLO
+recognition_controller = DegradationController()
+
+def match_faces(rgb_img, tier):
+    """Detect, encode and match faces at the given quality tier"""
+    # Detect on a downscaled copy when the tier asks for it
+    if tier.detection_scale < 1.0:
+        small = cv2.resize(rgb_img, (0, 0), fx=tier.detection_scale, fy=tier.detection_scale)
+        face_locations = [
+            tuple(int(v / tier.detection_scale) for v in loc)
+            for loc in face_recognition.face_locations(small, model="hog")
+        ]
+    else:
+        face_locations = face_recognition.face_locations(rgb_img, model="hog")
+    if not face_locations:
+        return {"status": "no_face", "message": "No face detected"}
+
+    if tier.single_face:
+        # Largest face only: (top, right, bottom, left)
+        face_locations = [max(face_locations, key=lambda loc: (loc[2] - loc[0]) * (loc[1] - loc[3]))]
+
+    face_encodings = face_recognition.face_encodings(rgb_img, face_locations)
+    if not face_encodings:
+        return {"status": "no_encoding", "message": "Could not encode face"}
+
+    # Compare with known faces
+    best_match, best_distance = None, float("inf")
+    for input_encoding in face_encodings:
+        match_key, match_distance = face_gallery.nearest(input_encoding)
+        if match_distance < best_distance:
+            best_match, best_distance = match_key, match_distance
+    return best_match, best_distance
+
+def decode_image(image_data):
+    """Decode a base64 (optionally data-URL) image to RGB, or None if invalid"""
+    # Remove base64 prefix if present
+    if "base64," in image_data:
+        image_data = image_data.split("base64,")[1]
+
+    image_bytes = base64.b64decode(image_data)
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+def recognize_rgb(rgb_img, tier, include_profile=False):
+    """Full recognition response for one RGB image at the given tier"""
+    outcome = match_faces(rgb_img, tier)
+    if isinstance(outcome, dict):
+        outcome["quality_tier"] = tier.name
+        return outcome
+    best_match, best_distance = outcome
+
+    tolerance = FACE_MATCH_TOLERANCE
+    if best_match and best_distance <= tolerance:
+        result = {
+            "status": "recognized",
+            "identifier": reported_identifier(best_match),
+            "confidence": float(f"{1 - best_distance:.2f}"),
+            "image_url": face_image_store.url_for(best_match),
+            "thumbnail_url": face_image_store.url_for(best_match, size=160),
+            "quality_tier": tier.name
+        }
+        if include_profile:
+            result["profile"] = profile_cache.get(best_match)
+        return result
+
+    else:
+        return {"status": "unrecognized", "message": "No matching face in registry", "quality_tier": tier.name}
 
 @app.post("/api/recognize-face")
 async def recognize_face(request: FaceRequest):
+    tier = recognition_controller.admit()
+    if tier is None:
+        return JSONResponse(
+            content={"status": "overloaded", "message": "Recognition is overloaded, retry shortly", "quality_tier": "shed"},
+            status_code=503,
+            headers={"Retry-After": "1"})
+
+    started = time.perf_counter()
     try:
-        image_data = request.image
-
-        # Remove base64 prefix if present
-        if "base64," in image_data:
-            image_data = image_data.split("base64,")[1]
-
-        image_bytes = base64.b64decode(image_data)
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if img is None:
+        rgb_img = decode_image(request.image)
+        if rgb_img is None:
             return JSONResponse(content={"error": "Invalid image data"}, status_code=400)
 
-        # Convert to RGB
-        rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-
-        # Detect face
-        face_locations = face_recognition.face_locations(rgb_img, model="hog")
-        if not face_locations:
-            return {"status": "no_face", "message": "No face detected"}
-
-        face_encodings = face_recognition.face_encodings(rgb_img, face_locations)
-        if not face_encodings:
-            return {"status": "no_encoding", "message": "Could not encode face"}
-
-        input_encoding = face_encodings[0]
-
-        # Compare with known faces
-        tolerance = 0.4
-        best_match = None
-        best_distance = 1.0
-
-        for registry_key, encodings in data_dict.items():
-            known_encodings = [np.array(enc) for enc in encodings]
-            distances = face_recognition.face_distance(known_encodings, input_encoding)
-            min_distance = min(distances)
-
-            if min_distance < best_distance:
-                best_distance = min_distance
-                best_match = registry_key
-
-        if best_match and best_distance <= tolerance:
-            if best_match.startswith("stu_"):
-                reg_no = best_match[4:]
-                return {
-                    "status": "recognized",
-                    "identifier": reg_no,
-                    "confidence": float(f"{1 - best_distance:.2f}"),
-                    "image_url": f"/face-images/{best_match}.jpg"
-                }
-            else:
-                return {
-                    "status": "recognized",
-                    "identifier": best_match,
-                    "confidence": float(f"{1 - best_distance:.2f}"),
-                    "image_url": f"/face-images/{best_match}.jpg"
-                }
-
-        else:
-            return {"status": "unrecognized", "message": "No matching face in registry"}
+        # Run the CPU-bound pipeline off the event loop so queued requests are visible
+        return await run_in_threadpool(recognize_rgb, rgb_img, tier, request.include_profile)
 
     except Exception as e:
         logger.error(f"Face recognition failed: {str(e)}")
         return JSONResponse(content={"error": str(e)}, status_code=500)
+    finally:
+        recognition_controller.release((time.perf_counter() - started) * 1000)
+
+@app.get("/api/recognize-face/metrics")
+def get_recognition_metrics():
+    return recognition_controller.snapshot()
+
+def recognize_camera_frame(frame):
+    # Cameras are already rate-limited by the scheduler, so they never shed,
+    # but their load still feeds the controller
+    tier = recognition_controller.admit(sheddable=False)
+    started = time.perf_counter()
+    try:
+        rgb_img = decode_image(frame.image)
+        if rgb_img is None:
+            return {"error": "Invalid image data"}
+        return recognize_rgb(rgb_img, tier, frame.include_profile)
+    finally:
+        recognition_controller.release((time.perf_counter() - started) * 1000)
+
+# Kiosk cameras, served fairly by weight with one latest frame each
+camera_scheduler = CameraScheduler(recognize_camera_frame)
+
+class CameraRegistration(BaseModel):
+    camera_id: str
+    name: Optional[str] = None
+    weight: int = 1  # relative share of recognition workers, e.g. exam hall 3, canteen 1
+
+@app.post("/api/cameras")
+def register_camera(camera: CameraRegistration):
+    if camera.weight < 1:
+        raise HTTPException(status_code=400, detail="Weight must be at least 1")
+    return camera_scheduler.register(camera.camera_id, camera.name, camera.weight)
+
+@app.get("/api/cameras")
+def get_cameras():
+    return camera_scheduler.stats()
+
+@app.delete("/api/cameras/{camera_id}")
+def unregister_camera(camera_id: str):
+    if not camera_scheduler.unregister(camera_id):
+        raise HTTPException(status_code=404, detail="Camera not found")
+    return {"message": "Camera unregistered"}
+
+@app.post("/api/cameras/{camera_id}/frames")
+async def submit_camera_frame(camera_id: str, request: FaceRequest, wait: bool = True):
+    try:
+        future = camera_scheduler.submit(camera_id, request)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Camera not found")
+    if not wait:
+        return {"status": "queued"}
+    return await asyncio.wrap_future(future)
+
+@app.get("/api/cameras/{camera_id}/result")
+def get_camera_result(camera_id: str):
+    try:
+        return camera_scheduler.last_result(camera_id) or {"status": "pending"}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Camera not found")
     
 def validate_roll_number(roll_number):
     """Validate roll number format"""
@@ -638,13 +783,61 @@ def validate_employee_id(employee_id):
         raise ValueError("Employee ID contains invalid characters")
     return employee_id.strip()
 
+# Held by every change to data_dict (enrollment, compaction, rebuild swap), so a
+# rebuild cannot replace the dict while another thread is updating it.
+# Taken before registry_write_lock when both are needed.
+registry_lock = threading.Lock()
+# Serializes registry writes so an older snapshot never lands after a newer one
+registry_write_lock = threading.Lock()
+compaction_lock = threading.Lock()
+
 def save_face_data():
     try:
-        with open(face_registry_path, 'w') as f:
-            json.dump(data_dict, f)
+        with registry_write_lock:
+            write_registry(face_registry_path, dict(data_dict))
     except Exception as e:
         logger.error(f"Error saving face data: {str(e)}")
 
+def save_face_tombstones():
+    write_registry(face_tombstones_path, sorted(face_gallery.tombstones()))
+
+def live_registry():
+    """data_dict without tombstoned keys"""
+    tombstones = face_gallery.tombstones()
+    return {key: encodings for key, encodings in dict(data_dict).items() if key not in tombstones}
+
+def unenroll_face(identity, background_tasks):
+    """Tombstone a deleted person's key and photo-slot keys, and compact if enough rows are dead"""
+    if not face_gallery.tombstone(identity):
+        return
+    save_face_tombstones()
+    if face_gallery.dead_fraction() >= COMPACTION_DEAD_FRACTION:
+        background_tasks.add_task(compact_face_registry)
+
+def compact_face_registry():
+    """Rewrite the registry without tombstoned keys; recognition keeps running meanwhile"""
+    if not compaction_lock.acquire(blocking=False):
+        return
+    try:
+        with registry_lock:
+            dead = face_gallery.tombstones()
+            for registry_key in dead:
+                # Skip keys re-enrolled since they were tombstoned; upload_face
+                # already reset their encodings and photo history on revive
+                if face_gallery.is_tombstoned(registry_key):
+                    data_dict.pop(registry_key, None)
+            save_face_data()
+            # Otherwise a later rebuild would re-encode the deleted person's photos
+            face_image_store.unlink([key for key in dead if key not in data_dict])
+            face_gallery.forget(dead)
+            face_gallery.rebuild(data_dict)
+            save_face_tombstones()
+        logger.info(f"Compacted face registry: removed {len(dead)} tombstoned keys")
+    except Exception as e:
+        logger.error(f"Face registry compaction failed: {str(e)}")
+    finally:
+        compaction_lock.release()
+
 def process_face_image(image_bytes, identifier):
     """Process and validate a face image"""
     try:
@@ -677,9 +870,12 @@ def process_face_image(image_bytes, identifier):
 
 @app.post("/api/upload-face")
 async def upload_face(
+    background_tasks: BackgroundTasks,
     face: UploadFile = File(...),
     identifier: str = Form(...),
-    id_type: str = Form(...)
+    id_type: str = Form(...),
+    slot: Optional[int] = Form(None),
+    allow_duplicate: bool = Form(False)
 ):
     try:
         if not face:
@@ -696,6 +892,8 @@ async def upload_face(
 
         if not identifier:
             raise HTTPException(status_code=400, detail="Identifier is required")
+        if slot is not None and slot < 0:
+            raise ValueError("Slot must be a non-negative number")
 
         contents = await face.read()
         if not contents:
@@ -703,26 +901,48 @@ async def upload_face(
 
         # Process face image
         face_encoding = process_face_image(contents, identifier)
-
-        # Save with prefixed filename
-        filename = f"{prefix}{identifier}.jpg"
-        filepath = os.path.join(images_path, filename)
-
-        img = Image.open(BytesIO(contents))
-        img.save(filepath, 'JPEG', quality=85, optimize=True)
-
-        # Update registry
-        registry_key = f"{prefix}{identifier}"
-        if registry_key not in data_dict:
-            data_dict[registry_key] = []
-        data_dict[registry_key].append(face_encoding.tolist())
-        save_face_data()
+        registry_key = registry_key_for(f"{prefix}{identifier}", slot)
+
+        # Refuse to enroll a face that already belongs to someone else
+        if not allow_duplicate:
+            match_key, match_distance = face_gallery.nearest(face_encoding, exclude=registry_key)
+            if match_key and match_distance <= FACE_MATCH_TOLERANCE:
+                return JSONResponse(status_code=409, content={
+                    "success": False,
+                    "status": "conflict",
+                    "message": "Face is already enrolled under a different identifier",
+                    "matched_key": match_key,
+                    "distance": round(match_distance, 4)
+                })
+
+        # Store the upload by content hash; thumbnails are made after the response
+        digest = face_image_store.put_original(contents)
+        background_tasks.add_task(face_image_store.make_thumbnails, digest)
+
+        # Update registry; a deleted person enrolling again starts from a clean slate
+        with registry_lock:
+            if face_gallery.is_tombstoned(registry_key):
+                data_dict[registry_key] = []
+                # Drop the old photo history too, or a rebuild would fold the
+                # deleted person's face into the new enrollment
+                face_image_store.unlink([registry_key])
+                face_gallery.revive(registry_key)
+                save_face_tombstones()
+            face_image_store.link(registry_key, digest)
+            if registry_key not in data_dict:
+                data_dict[registry_key] = []
+            data_dict[registry_key].append(face_encoding.tolist())
+            if len(data_dict[registry_key]) > MAX_ENCODINGS_PER_IDENTITY:
+                data_dict[registry_key] = compress_encodings(data_dict[registry_key])
+            face_gallery.rebuild(data_dict)
+            save_face_data()
+        profile_cache.invalidate(registry_key)
 
         return {
             "success": True,
             "identifier": identifier,
             "id_type": id_type,
-            "image_path": filename
+            "image_path": face_image_store.url_for(registry_key)
         }
 
     except ValueError as ve:
@@ -731,6 +951,127 @@ async def upload_face(
         logger.error(f"Upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/face-registry/duplicates")
+def audit_face_registry(tolerance: float = FACE_MATCH_TOLERANCE):
+    pairs = find_duplicate_identities(live_registry(), tolerance)
+    return {"tolerance": tolerance, "count": len(pairs), "pairs": pairs}
+
+# Recorded-video attendance jobs, keyed by job id
+video_jobs = {}
+
+def run_video_job(job_id, video_path, registry):
+    video_jobs[job_id]["status"] = "processing"
+    try:
+        result = process_video(video_path, registry)
+        video_jobs[job_id].update(status="completed", **result)
+        logger.info(f"Video job {job_id} processed {result['video_seconds']}s of video at {result['video_seconds_per_second']}x")
+    except Exception as e:
+        logger.error(f"Video job {job_id} failed: {str(e)}")
+        video_jobs[job_id].update(status="failed", error=str(e))
+    finally:
+        os.remove(video_path)
+
+@app.post("/api/attendance/video")
+async def ingest_video(background_tasks: BackgroundTasks, video: UploadFile = File(...)):
+    suffix = os.path.splitext(video.filename or "")[1] or ".mp4"
+    fd, video_path = tempfile.mkstemp(suffix=suffix)
+    # Stream the upload to disk; VideoCapture needs a file path
+    with os.fdopen(fd, "wb") as f:
+        while chunk := await video.read(1024 * 1024):
+            f.write(chunk)
+
+    job_id = uuid4().hex
+    video_jobs[job_id] = {"job_id": job_id, "status": "queued", "filename": video.filename}
+    background_tasks.add_task(run_video_job, job_id, video_path, live_registry())
+    return video_jobs[job_id]
+
+@app.get("/api/attendance/video/{job_id}")
+def get_video_job(job_id: str):
+    job = video_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Video job not found")
+    return job
+
+# Status of the most recent registry rebuild from stored face images
+rebuild_job = {"status": "idle"}
+
+def run_registry_rebuild():
+    global data_dict
+    started = time.time()
+    rebuild_job.update(status="running", started_at=datetime.utcnow().isoformat(), done=0, total=0, failed=[])
+    try:
+        registry, rebuilt_digests, failed = rebuild_registry(
+            face_image_store, images_path,
+            progress=lambda done, total: rebuild_job.update(done=done, total=total))
+        # Merge against the live dict and swap under registry_lock, so no
+        # enrollment or compaction lands in the old dict after the merge
+        with registry_lock:
+            changed = {key for key in set(registry) | set(data_dict)
+                       if face_image_store.digests_for(key) != rebuilt_digests.get(key)}
+            # Drop keys whose photos changed or were unlinked while the rebuild ran...
+            registry = {key: encodings for key, encodings in registry.items() if key not in changed}
+            # ...and keep the live encodings for anyone enrolled meanwhile
+            registry.update((key, data_dict[key]) for key in changed if key in data_dict)
+            # Photos of deleted people are still in the image store; leave them out
+            dead = face_gallery.tombstones()
+            registry = {key: encodings for key, encodings in registry.items() if key not in dead}
+            face_image_store.unlink(dead)
+            with registry_write_lock:
+                write_registry(face_registry_path, registry)
+            # Recognition keeps using the old gallery until rebuild() swaps its snapshot
+            data_dict = registry
+            face_gallery.forget(dead)
+            face_gallery.rebuild(data_dict)
+            save_face_tombstones()
+        profile_cache.clear()
+        profile_cache.warm(data_dict.keys())
+        rebuild_job.update(status="completed", identities=len(registry), failed=failed,
+                           seconds=round(time.time() - started, 1))
+        logger.info(f"Face registry rebuilt: {len(registry)} identities, {len(failed)} images without a face")
+    except Exception as e:
+        logger.error(f"Face registry rebuild failed: {str(e)}")
+        rebuild_job.update(status="failed", error=str(e))
+
+@app.post("/api/face-registry/rebuild")
+def start_registry_rebuild(background_tasks: BackgroundTasks):
+    if rebuild_job["status"] == "running":
+        raise HTTPException(status_code=409, detail="A registry rebuild is already running")
+    rebuild_job.update(status="running")
+    background_tasks.add_task(run_registry_rebuild)
+    return rebuild_job
+
+@app.get("/api/face-registry/rebuild")
+def get_registry_rebuild():
+    return rebuild_job
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@app.get("/face-images/by-hash/{digest}")
+def get_face_image(digest: str, request: Request, size: Optional[int] = None):
+    if not DIGEST_PATTERN.match(digest) or (size is not None and size not in THUMBNAIL_SIZES):
+        raise HTTPException(status_code=404, detail="Image not found")
+    # Originals stay internal (rebuilds re-encode them); clients only ever get
+    # re-encoded thumbnails, which carry no metadata even for old originals
+    size = size or max(THUMBNAIL_SIZES)
+    # Content never changes for a digest, so the ETag is just digest and size
+    etag = f'"{digest}-{size}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    data = face_image_store.read(digest, size)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return Response(content=data, media_type=sniff_media_type(data), headers=headers)
+
+@app.get("/face-images/{registry_key}.jpg")
+def get_face_image_by_key(registry_key: str, size: Optional[int] = None):
+    # Keys are repointed on re-enrollment, so only the redirect target is cacheable
+    url = face_image_store.url_for(registry_key, size)
+    if url is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return RedirectResponse(url, status_code=307, headers={"Cache-Control": "no-cache"})
+
 @app.post("/api/verify-face")
 async def verify_face(
     face: UploadFile = File(...),
@@ -0,0 +1,81 @@
+"""Compare the ORM + pydantic list path with the column-tuple + orjson path.
+
+    python bench_list_serialization.py [--rows 50000] [--repeat 5]
+
+Builds a synthetic organization of students in memory (no database) and
+reports throughput and peak allocations for serializing the whole list.
+The "orm" path runs ORM rows through FastAPI's own response handling for
+response_model=List[StudentOut] (serialize_response, then JSONResponse);
+the "tuples" path is what get_students_by_org now does.
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import date
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from schemas import StudentOut, student_out_columns
+from fast_json import dump_rows
+from models.student import Student
+
+# The cloned response field FastAPI builds for a route with this response_model
+response_field = APIRoute("/", lambda: None, response_model=List[StudentOut]).secure_cloned_response_field
+
+
+def synthetic_rows(count):
+    org_id, dept_id, class_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    return [
+        (uuid.uuid4(), f"R{i:06d}", f"Student {i}", f"student{i}@example.com", "9000000000",
+         dept_id, class_id, str(i % 8 + 1), "B.E", "Some street", date(2004, 1, 1 + i % 28),
+         "female" if i % 2 else "male", date(2025, 6, 9), org_id)
+        for i in range(count)
+    ]
+
+
+def orm_path(rows):
+    names = [column.key for column in student_out_columns]
+    # ORM hydration, then the same validation, jsonable encoding and rendering
+    # FastAPI applies to an endpoint returning ORM objects
+    students = [Student(**dict(zip(names, row))) for row in rows]
+    content = asyncio.run(serialize_response(field=response_field, response_content=students))
+    return JSONResponse(content=content).body
+
+
+def tuple_path(rows):
+    return dump_rows(student_out_columns, rows)
+
+
+def measure(fn, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(rows)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    assert json.loads(orm_path(rows[:10])) == json.loads(tuple_path(rows[:10])), "paths disagree"
+
+    print(f"{'path':8} {'seconds':>9} {'rows/s':>12} {'peak MiB':>10} {'body MiB':>10}")
+    for name, fn in (("orm", orm_path), ("tuples", tuple_path)):
+        seconds, peak, size = measure(fn, rows, args.repeat)
+        print(f"{name:8} {seconds:9.3f} {args.rows / seconds:12,.0f} {peak / 2**20:10.1f} {size / 2**20:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare match rates with every enrolled encoding against compressed prototypes.
+
+    python bench_prototype_recall.py [--identities 300] [--enrollments 20] [--queries 10]
+
+Builds a synthetic gallery (no images or database): each identity has a few
+pose/lighting modes, and enrollments and queries are noisy samples of them,
+scaled so same-person distances sit near 0.35 and different people near 0.8
+like face_recognition encodings. Reports recall (query matched to the right
+identity within tolerance), false matches and gallery rows for both galleries.
+"""
+import argparse
+import time
+import numpy as np
+from face_gallery import FaceGallery, FACE_MATCH_TOLERANCE, ENCODING_SIZE
+from face_prototypes import compress_encodings, MAX_ENCODINGS_PER_IDENTITY
+
+IDENTITY_SPREAD = 0.05
+MODE_SPREAD = 0.012
+SAMPLE_NOISE = 0.02
+MODES_PER_IDENTITY = 3
+
+
+def synthetic_identities(count, enrollments, queries, rng, noise=SAMPLE_NOISE):
+    common = rng.normal(0.0, 0.09, ENCODING_SIZE)
+    gallery, probes = {}, []
+    for i in range(count):
+        centre = common + rng.normal(0.0, IDENTITY_SPREAD, ENCODING_SIZE)
+        modes = centre + rng.normal(0.0, MODE_SPREAD, (MODES_PER_IDENTITY, ENCODING_SIZE))
+        picks = rng.integers(0, MODES_PER_IDENTITY, enrollments + queries)
+        samples = modes[picks] + rng.normal(0.0, noise, (len(picks), ENCODING_SIZE))
+        gallery[f"stu_R{i:05d}"] = samples[:enrollments].tolist()
+        probes.extend((f"stu_R{i:05d}", sample) for sample in samples[enrollments:])
+    return gallery, probes
+
+
+def match_rates(registry, probes, tolerance):
+    gallery = FaceGallery(registry)
+    correct = wrong = 0
+    started = time.perf_counter()
+    for expected, encoding in probes:
+        key, distance = gallery.nearest(encoding)
+        if distance <= tolerance:
+            if key == expected:
+                correct += 1
+            else:
+                wrong += 1
+    seconds = time.perf_counter() - started
+    rows = sum(len(encodings) for encodings in registry.values())
+    return correct / len(probes), wrong / len(probes), rows, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--identities", type=int, default=300)
+    parser.add_argument("--enrollments", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--tolerance", type=float, default=FACE_MATCH_TOLERANCE)
+    parser.add_argument("--noise", type=float, default=SAMPLE_NOISE,
+                        help="per-sample noise; raise it to push same-person distances towards the tolerance")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    full, probes = synthetic_identities(args.identities, args.enrollments, args.queries,
+                                        np.random.default_rng(args.seed), args.noise)
+    compressed = {key: compress_encodings(encodings) for key, encodings in full.items()}
+
+    print(f"{'gallery':12} {'rows':>8} {'recall':>8} {'false':>8} {'seconds':>9}")
+    for name, registry in (("full", full), (f"max {MAX_ENCODINGS_PER_IDENTITY}", compressed)):
+        recall, false_rate, rows, seconds = match_rates(registry, probes, args.tolerance)
+        print(f"{name:12} {rows:8d} {recall:8.2%} {false_rate:8.2%} {seconds:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
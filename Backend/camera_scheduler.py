@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+CAMERA_WORKERS = int(os.getenv("CAMERA_WORKERS", 2))
+# Per-camera throughput is measured over this many seconds
+THROUGHPUT_WINDOW_SECONDS = 10.0
+
+
+class CameraSlot:
+    """One registered camera with room for a single pending frame"""
+
+    def __init__(self, camera_id, name, weight):
+        self.camera_id = camera_id
+        self.name = name or camera_id
+        self.weight = weight
+        self.frame = None
+        self.future = None
+        self.current_weight = 0
+        self.last_result = None
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.completed_at = deque()
+
+    def stats(self, now):
+        while self.completed_at and now - self.completed_at[0] > THROUGHPUT_WINDOW_SECONDS:
+            self.completed_at.popleft()
+        return {
+            "camera_id": self.camera_id,
+            "name": self.name,
+            "weight": self.weight,
+            "pending": self.frame is not None,
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "frames_per_second": round(len(self.completed_at) / THROUGHPUT_WINDOW_SECONDS, 2),
+        }
+
+
+class CameraScheduler:
+    """Fair dispatch of camera frames to recognition workers.
+
+    Every camera keeps at most one pending frame: a newer frame replaces the
+    older one, which resolves as superseded and counts as dropped. Workers
+    pick the next camera by smooth weighted round-robin over cameras with a
+    pending frame, so a camera with weight 3 is served three times as often
+    as a weight-1 camera under contention, and a chatty camera can never
+    push out a quiet one.
+    """
+
+    def __init__(self, handler, workers=CAMERA_WORKERS):
+        self._handler = handler
+        self._slots = {}
+        self._ready = threading.Condition()
+        self._workers = [threading.Thread(target=self._work, name=f"camera-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def register(self, camera_id, name=None, weight=1):
+        with self._ready:
+            slot = self._slots.get(camera_id)
+            if slot:
+                slot.name = name or slot.name
+                slot.weight = weight
+            else:
+                slot = self._slots[camera_id] = CameraSlot(camera_id, name, weight)
+            return slot.stats(time.monotonic())
+
+    def unregister(self, camera_id):
+        with self._ready:
+            slot = self._slots.pop(camera_id, None)
+        if slot and slot.future:
+            slot.future.set_result({"status": "superseded", "message": "Camera was unregistered"})
+        return slot is not None
+
+    def submit(self, camera_id, frame):
+        """Queue frame as the camera's latest; returns a Future for its recognition result"""
+        future = Future()
+        with self._ready:
+            slot = self._slots.get(camera_id)
+            if slot is None:
+                raise KeyError(camera_id)
+            replaced = slot.future
+            if replaced:
+                slot.dropped += 1
+            slot.frame, slot.future = frame, future
+            slot.submitted += 1
+            self._ready.notify()
+        if replaced:
+            replaced.set_result({"status": "superseded", "message": "A newer frame from this camera replaced it"})
+        return future
+
+    def last_result(self, camera_id):
+        with self._ready:
+            slot = self._slots.get(camera_id)
+            if slot is None:
+                raise KeyError(camera_id)
+            return slot.last_result
+
+    def stats(self):
+        now = time.monotonic()
+        with self._ready:
+            return [slot.stats(now) for slot in self._slots.values()]
+
+    def _next_slot(self):
+        ready = [slot for slot in self._slots.values() if slot.frame is not None]
+        if not ready:
+            return None
+        total = 0
+        for slot in ready:
+            slot.current_weight += slot.weight
+            total += slot.weight
+        chosen = max(ready, key=lambda slot: slot.current_weight)
+        chosen.current_weight -= total
+        return chosen
+
+    def _work(self):
+        while True:
+            with self._ready:
+                slot = self._next_slot()
+                while slot is None:
+                    self._ready.wait()
+                    slot = self._next_slot()
+                frame, future = slot.frame, slot.future
+                slot.frame = slot.future = None
+
+            try:
+                result, ok = self._handler(frame), True
+            except Exception as e:
+                result, ok = {"error": str(e)}, False
+
+            with self._ready:
+                if ok:
+                    slot.processed += 1
+                    slot.completed_at.append(time.monotonic())
+                else:
+                    slot.failed += 1
+                slot.last_result = result
+            future.set_result(result)
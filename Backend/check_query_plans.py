@@ -0,0 +1,87 @@
+"""EXPLAIN the hot API queries and fail if any of them needs a sequential scan.
+
+Run after `alembic upgrade head`:
+
+    python check_query_plans.py [--seed]
+
+--seed first loads the sample rows from "db Data/". Sequential scans are
+disabled for the session, so the planner only falls back to one when no
+usable index exists, however small the tables are.
+"""
+import argparse
+import os
+import sys
+import uuid
+from sqlalchemy import select, func
+from sqlalchemy.dialects import postgresql
+from models.base import engine
+from models.class_model import Class
+from models.student import Student
+from models.department import Department
+from models.staff import Staff
+
+SEED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "db Data")
+# Parents before children so foreign keys resolve
+SEED_FILES = ["organizations_rows.sql", "departments_rows.sql", "classes_rows.sql",
+              "staff_rows.sql", "students_rows.sql"]
+
+
+def seed(conn):
+    for filename in SEED_FILES:
+        with open(os.path.join(SEED_DIR, filename), "r") as f:
+            conn.exec_driver_sql(f.read().rstrip().rstrip(";") + " ON CONFLICT DO NOTHING")
+
+
+def sample_values(conn):
+    row = conn.execute(select(Student.organization_id, Student.department_id, Student.roll_number).limit(1)).first()
+    if row:
+        return row
+    return uuid.uuid4(), uuid.uuid4(), "0"
+
+
+def hot_queries(org_id, department_id, roll_number):
+    return {
+        "get_students_by_org": select(Student).where(Student.organization_id == org_id),
+        "get_staff": select(Staff).where(Staff.organization_id == org_id),
+        "get_departments": select(Department).where(Department.organization_id == org_id),
+        "get_classes": select(Class).where(Class.organization_id == org_id),
+        "dashboard student count": select(func.count()).select_from(Student).where(Student.organization_id == org_id),
+        "dashboard department count": select(func.count()).select_from(Student).where(Student.department_id == department_id),
+        "get_student_by_roll": select(Student).where(Student.roll_number == roll_number).limit(1),
+    }
+
+
+def seq_scans(plan):
+    """Relation names of every Seq Scan node in an EXPLAIN (FORMAT JSON) plan"""
+    found = [plan["Relation Name"]] if plan.get("Node Type") == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help='load the sample rows from "db Data/" first')
+    args = parser.parse_args()
+
+    failures = []
+    with engine.begin() as conn:
+        if args.seed:
+            seed(conn)
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for name, stmt in hot_queries(*sample_values(conn)).items():
+            compiled = stmt.compile(dialect=postgresql.psycopg2.dialect())
+            result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+            tables = seq_scans(result[0]["Plan"])
+            status = "SEQ SCAN on " + ", ".join(tables) if tables else "ok"
+            print(f"{name:30} {status}")
+            if tables:
+                failures.append(name)
+
+    if failures:
+        print(f"{len(failures)} hot queries fall back to a sequential scan", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
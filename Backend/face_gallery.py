@@ -0,0 +1,260 @@
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import numpy as np
+
+# Maximum face distance for two encodings to count as the same person
+FACE_MATCH_TOLERANCE = 0.4
+ENCODING_SIZE = 128
+AUDIT_BLOCK_SIZE = 1024
+STUDENT_PREFIX = "stu_"
+STAFF_PREFIX = "staff_"
+# Extra photos of one person are enrolled as <prefix><id>.<slot>. Roll numbers
+# and employee IDs may not contain ".", so the slot never mixes with the id.
+SLOT_SEPARATOR = "."
+# Key shape written by the old student form, which appended "-<slot>" to the roll
+LEGACY_SLOT_PATTERN = re.compile(r'^(stu_.+)-(\d+)$')
+
+
+def registry_key_for(identity, slot=None):
+    return identity if slot is None else f"{identity}{SLOT_SEPARATOR}{slot}"
+
+
+def identity_of(registry_key):
+    """Registry key with its photo-slot suffix, if any, removed"""
+    return registry_key.partition(SLOT_SEPARATOR)[0]
+
+
+def split_identity(registry_key):
+    """(id_type, id) of the person a registry key belongs to, e.g.
+    ("student", "CS-2021-045") for stu_CS-2021-045.1; id_type is None for
+    keys with an unknown prefix"""
+    identity = identity_of(registry_key)
+    if identity.startswith(STUDENT_PREFIX):
+        return "student", identity[len(STUDENT_PREFIX):]
+    if identity.startswith(STAFF_PREFIX):
+        return "staff", identity[len(STAFF_PREFIX):]
+    return None, identity
+
+
+def reported_identifier(registry_key):
+    """Identifier the recognition endpoints report for a registry key: the
+    roll number for students, the slot-free key otherwise"""
+    id_type, id_ = split_identity(registry_key)
+    return id_ if id_type == "student" else identity_of(registry_key)
+
+
+def legacy_slot_renames(registry_keys, known_roll_numbers):
+    """Map old stu_<roll>-<n> keys to stu_<roll>.<n>.
+
+    A hyphen suffix is ambiguous on its own, so a key is only renamed when
+    known_roll_numbers (from the database) contains <roll> but not <roll>-<n>.
+    """
+    renames = {}
+    for key in registry_keys:
+        match = LEGACY_SLOT_PATTERN.match(key)
+        if not match:
+            continue
+        base, slot = match.groups()
+        if base[4:] in known_roll_numbers and key[4:] not in known_roll_numbers:
+            renames[key] = registry_key_for(base, slot)
+    return renames
+
+
+def write_registry(path, registry):
+    """Write JSON to path atomically so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(registry, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+def _distances(rows, matrix):
+    """Euclidean distances between each row and every row of matrix"""
+    sq = np.sum(rows ** 2, axis=1)[:, None] + np.sum(matrix ** 2, axis=1)[None, :]
+    return np.sqrt(np.maximum(sq - 2.0 * rows @ matrix.T, 0.0))
+
+
+def _stack_registry(registry):
+    """Flatten a registry dict into (matrix, row labels, keys)"""
+    keys = [key for key, encodings in registry.items() if encodings]
+    counts = [len(registry[key]) for key in keys]
+    if not keys:
+        return np.empty((0, ENCODING_SIZE)), np.empty(0, dtype=np.int64), keys
+    matrix = np.asarray([enc for key in keys for enc in registry[key]], dtype=np.float64)
+    labels = np.repeat(np.arange(len(keys)), counts)
+    return matrix, labels, keys
+
+
+class GallerySnapshot:
+    """Immutable stacked encodings plus a mutable per-key liveness mask"""
+
+    def __init__(self, registry, tombstones):
+        self.matrix, self.labels, self.keys = _stack_registry(registry)
+        # Rows are grouped by identity, so a segmented min gives per-key minima
+        self.starts = np.flatnonzero(np.r_[True, self.labels[1:] != self.labels[:-1]]) if self.keys else self.labels
+        self.counts = np.bincount(self.labels, minlength=len(self.keys))
+        self.key_index = {key: idx for idx, key in enumerate(self.keys)}
+        self.identity_keys = {}
+        for key in self.keys:
+            self.identity_keys.setdefault(identity_of(key), []).append(key)
+        self.alive = np.array([key not in tombstones for key in self.keys], dtype=bool)
+
+
+class FaceGallery:
+    """In-memory index over the face registry.
+
+    All encodings are kept in one contiguous matrix so a lookup is a single
+    vectorized distance computation instead of a Python loop over identities.
+    rebuild() swaps in a new snapshot in one assignment, so readers never see
+    a half-built index.
+
+    Deleted people are tombstoned rather than removed: their keys are masked
+    out of matching immediately and stay in the registry until compaction
+    rewrites it without them.
+    """
+
+    def __init__(self, registry=None, tombstones=()):
+        self._tombstones = set(tombstones)
+        self._lock = threading.Lock()
+        self._snapshot = GallerySnapshot({}, self._tombstones)
+        if registry is not None:
+            self.rebuild(registry)
+
+    def rebuild(self, registry):
+        # Copy under the lock so the last rebuild always sees the latest registry
+        with self._lock:
+            self._snapshot = GallerySnapshot(dict(registry), self._tombstones)
+
+    def __len__(self):
+        return len(self._snapshot.keys)
+
+    def tombstone(self, identity):
+        """Exclude identity's own key and its <identity>.<slot> keys from matching.
+
+        identity must be a full key such as stu_<roll>, not a slot key, so
+        another person whose id merely starts with the same text is untouched.
+        Returns the keys marked.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            keys = snapshot.identity_keys.get(identity, [])
+            for key in keys:
+                snapshot.alive[snapshot.key_index[key]] = False
+            self._tombstones.update(keys)
+            return keys
+
+    def revive(self, registry_key):
+        """Drop a tombstone, e.g. when the key is enrolled again; takes effect on rebuild"""
+        with self._lock:
+            self._tombstones.discard(registry_key)
+
+    def is_tombstoned(self, registry_key):
+        return registry_key in self._tombstones
+
+    def tombstones(self):
+        with self._lock:
+            return set(self._tombstones)
+
+    def forget(self, registry_keys):
+        """Clear tombstones for keys that compaction has removed from the registry"""
+        with self._lock:
+            self._tombstones.difference_update(registry_keys)
+
+    def dead_fraction(self):
+        """Share of gallery rows that belong to tombstoned keys"""
+        snapshot = self._snapshot
+        total = snapshot.counts.sum()
+        return float(snapshot.counts[~snapshot.alive].sum() / total) if total else 0.0
+
+    @staticmethod
+    def _identity_distances(snapshot, encoding):
+        row_distances = _distances(np.asarray(encoding, dtype=np.float64)[None, :], snapshot.matrix)[0]
+        distances = np.minimum.reduceat(row_distances, snapshot.starts)
+        distances[~snapshot.alive] = np.inf
+        return distances
+
+    def identity_distances(self, encoding):
+        """Smallest distance from encoding to each identity, as (keys, distances)"""
+        snapshot = self._snapshot
+        if not snapshot.keys:
+            return snapshot.keys, np.empty(0)
+        return snapshot.keys, self._identity_distances(snapshot, encoding)
+
+    def nearest(self, encoding, exclude=None):
+        """Closest identity to encoding as (key, distance), or (None, inf) if empty.
+
+        Keys belonging to the same identity as exclude are skipped.
+        """
+        snapshot = self._snapshot
+        if not snapshot.keys:
+            return None, float("inf")
+        distances = self._identity_distances(snapshot, encoding)
+        if exclude:
+            for key in snapshot.identity_keys.get(identity_of(exclude), []):
+                distances[snapshot.key_index[key]] = np.inf
+        idx = int(np.argmin(distances))
+        if not np.isfinite(distances[idx]):
+            return None, float("inf")
+        return snapshot.keys[idx], float(distances[idx])
+
+
+def find_duplicate_identities(registry, tolerance=FACE_MATCH_TOLERANCE, block_size=AUDIT_BLOCK_SIZE):
+    """Find all pairs of different identities whose faces are within tolerance.
+
+    Computes every cross-identity distance in blocks of block_size rows and
+    keeps the closest distance per identity pair. Returns a list of
+    {"first", "second", "distance"} dicts, closest first.
+    """
+    by_identity = {}
+    for registry_key, encodings in registry.items():
+        by_identity.setdefault(identity_of(registry_key), []).extend(encodings)
+    matrix, labels, keys = _stack_registry(by_identity)
+    n_keys = len(keys)
+    codes, dists = [], []
+    for start in range(0, len(matrix), block_size):
+        block = matrix[start:start + block_size]
+        block_labels = labels[start:start + block_size]
+        distances = _distances(block, matrix)
+        # Only look at each identity pair once and never within an identity
+        distances[block_labels[:, None] >= labels[None, :]] = np.inf
+        rows, cols = np.nonzero(distances <= tolerance)
+        codes.append(block_labels[rows] * n_keys + labels[cols])
+        dists.append(distances[rows, cols])
+
+    if not codes:
+        return []
+    codes = np.concatenate(codes)
+    dists = np.concatenate(dists)
+    if len(codes) == 0:
+        return []
+    order = np.lexsort((dists, codes))
+    codes, dists = codes[order], dists[order]
+    first = np.r_[True, codes[1:] != codes[:-1]]
+    codes, dists = codes[first], dists[first]
+
+    pairs = [
+        {"first": keys[code // n_keys], "second": keys[code % n_keys], "distance": round(float(dist), 4)}
+        for code, dist in zip(codes, dists)
+    ]
+    pairs.sort(key=lambda pair: pair["distance"])
+    return pairs
+
+
+if __name__ == "__main__":
+    # Offline audit: python face_gallery.py [face_registry.json] [tolerance]
+    path = sys.argv[1] if len(sys.argv) > 1 else "face-images/face_registry.json"
+    tolerance = float(sys.argv[2]) if len(sys.argv) > 2 else FACE_MATCH_TOLERANCE
+    with open(path, "r") as f:
+        registry = json.load(f)
+    pairs = find_duplicate_identities(registry, tolerance)
+    for pair in pairs:
+        print(f"{pair['first']}\t{pair['second']}\t{pair['distance']:.4f}")
+    print(f"{len(pairs)} near-duplicate identity pairs across {len(registry)} identities", file=sys.stderr)
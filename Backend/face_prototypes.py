@@ -0,0 +1,85 @@
+import os
+import numpy as np
+
+# Cap on stored encodings per registry key. Re-enrolling past this merges or
+# prunes encodings instead of growing the gallery.
+MAX_ENCODINGS_PER_IDENTITY = int(os.getenv("MAX_ENCODINGS_PER_IDENTITY", 5))
+# Encodings closer than this are treated as the same pose/lighting and merged
+# into their centroid. Kept well under the recognition tolerance (0.4).
+PROTOTYPE_MERGE_DISTANCE = float(os.getenv("PROTOTYPE_MERGE_DISTANCE", 0.25))
+KMEDOIDS_ITERATIONS = 10
+
+
+def _pairwise_distances(points):
+    sq = np.sum(points ** 2, axis=1)
+    d2 = sq[:, None] + sq[None, :] - 2.0 * points @ points.T
+    return np.sqrt(np.maximum(d2, 0.0))
+
+
+def merge_redundant(points, merge_distance=PROTOTYPE_MERGE_DISTANCE):
+    """Collapse groups of near-identical encodings into their centroid"""
+    dist = _pairwise_distances(points)
+    unassigned = np.ones(len(points), dtype=bool)
+    merged = []
+    # Greedily seed from the point with the most close neighbours so dense
+    # clusters collapse first.
+    neighbour_counts = (dist <= merge_distance).sum(axis=1)
+    for idx in np.argsort(-neighbour_counts, kind="stable"):
+        if not unassigned[idx]:
+            continue
+        members = unassigned & (dist[idx] <= merge_distance)
+        merged.append(points[members].mean(axis=0))
+        unassigned &= ~members
+    return np.array(merged)
+
+
+def select_medoids(points, k, iterations=KMEDOIDS_ITERATIONS):
+    """Pick k diverse, representative encodings with a small k-medoids pass"""
+    dist = _pairwise_distances(points)
+    # Farthest-point initialisation, starting from the overall medoid
+    medoids = [int(np.argmin(dist.sum(axis=1)))]
+    while len(medoids) < k:
+        medoids.append(int(np.argmax(dist[:, medoids].min(axis=1))))
+    medoids = np.array(medoids)
+
+    for _ in range(iterations):
+        assignment = np.argmin(dist[:, medoids], axis=1)
+        updated = medoids.copy()
+        for cluster in range(k):
+            members = np.flatnonzero(assignment == cluster)
+            if len(members) == 0:
+                continue
+            within = dist[np.ix_(members, members)].sum(axis=1)
+            updated[cluster] = members[np.argmin(within)]
+        if np.array_equal(updated, medoids):
+            break
+        medoids = updated
+    return points[medoids]
+
+
+def compress_encodings(encodings, max_prototypes=MAX_ENCODINGS_PER_IDENTITY,
+                       merge_distance=PROTOTYPE_MERGE_DISTANCE):
+    """Bound the encodings kept for one identity.
+
+    Near-duplicates are merged into centroids first; if the identity still has
+    more than max_prototypes encodings, a diverse subset is kept via k-medoids.
+    Returns a list of plain float lists, ready for face_registry.json.
+    """
+    if len(encodings) <= max_prototypes:
+        return [list(map(float, enc)) for enc in encodings]
+
+    points = np.asarray(encodings, dtype=np.float64)
+    points = merge_redundant(points, merge_distance)
+    if len(points) > max_prototypes:
+        points = select_medoids(points, max_prototypes)
+    return points.tolist()
+
+
+def compress_registry(registry, max_prototypes=MAX_ENCODINGS_PER_IDENTITY):
+    """Compress every over-cap identity in a registry dict in place"""
+    compressed = 0
+    for registry_key, encodings in registry.items():
+        if len(encodings) > max_prototypes:
+            registry[registry_key] = compress_encodings(encodings, max_prototypes)
+            compressed += 1
+    return compressed
@@ -0,0 +1,24 @@
+from decimal import Decimal
+import orjson
+
+
+def columns_for(model, schema):
+    """ORM columns matching the fields of a response schema, in schema order"""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def _default(value):
+    # Numeric columns come back as Decimal; the response models expose floats
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+def dump_rows(columns, rows):
+    """Serialize column tuples from a select() straight to a JSON array of objects.
+
+    Skips ORM hydration and per-row pydantic validation; orjson handles the
+    UUID, date and datetime values natively.
+    """
+    names = [column.key for column in columns]
+    return orjson.dumps([dict(zip(names, row)) for row in rows], default=_default)
@@ -0,0 +1,254 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from io import BytesIO
+from PIL import Image, ImageOps
+
+# "local" keeps images under face-images/; "s3" uses any S3-compatible store
+# (e.g. MinIO) configured by S3_ENDPOINT_URL and S3_BUCKET.
+IMAGE_STORE_BACKEND = os.getenv("IMAGE_STORE_BACKEND", "local")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_BUCKET = os.getenv("S3_BUCKET", "face-images")
+
+THUMBNAIL_SIZES = (64, 160, 480)
+INDEX_NAME = "image_index.json"
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+# Photos saved by upload_face before the content-addressed store
+LEGACY_IMAGE_PATTERN = re.compile(r'^((?:stu|staff)_[a-zA-Z0-9\-_]+)\.jpg$')
+
+
+def strip_metadata(contents):
+    """Re-encode an image without EXIF (GPS, device, timestamps) or other metadata.
+
+    Orientation is applied to the pixels first so the photo still displays
+    upright. Raises ValueError if contents is not an image PIL can read.
+    """
+    try:
+        img = Image.open(BytesIO(contents))
+        image_format = img.format
+        img = ImageOps.exif_transpose(img)
+    except Exception as e:
+        raise ValueError(f"Unreadable image: {str(e)}")
+    out = BytesIO()
+    if image_format == "PNG":
+        img.save(out, "PNG", optimize=True)
+    else:
+        img.convert("RGB").save(out, "JPEG", quality=95)
+    return out.getvalue()
+
+
+def sniff_media_type(data):
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+class LocalImageBackend:
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, *name.split("/"))
+
+    def exists(self, name):
+        return os.path.exists(self._path(name))
+
+    def get(self, name):
+        try:
+            with open(self._path(name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, name, data):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+
+class S3ImageBackend:
+    def __init__(self, bucket, endpoint_url=None):
+        import boto3
+        from botocore.exceptions import ClientError
+        self._client = boto3.client("s3", endpoint_url=endpoint_url)
+        self._client_error = ClientError
+        self.bucket = bucket
+
+    def exists(self, name):
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=name)
+            return True
+        except self._client_error:
+            return False
+
+    def get(self, name):
+        try:
+            return self._client.get_object(Bucket=self.bucket, Key=name)["Body"].read()
+        except self._client_error:
+            return None
+
+    def put(self, name, data):
+        self._client.put_object(Bucket=self.bucket, Key=name, Body=data)
+
+
+class FaceImageStore:
+    """Face photos stored by content hash, with registry keys pointing at them.
+
+    Originals are stored under the SHA-256 of their metadata-stripped bytes,
+    so identical uploads are stored once and never carry EXIF/GPS data. Each registry key keeps the history of digests
+    enrolled under it, current photo last, because its registry encodings
+    are prototypes of all of them and a rebuild has to re-encode every one.
+    Thumbnails are derived per digest and never change, which lets them be
+    served with immutable cache headers.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        index = json.loads(backend.get(INDEX_NAME) or "{}")
+        # Indexes written before digest history map each key to a single digest
+        self._index = {key: [digests] if isinstance(digests, str) else digests
+                       for key, digests in index.items()}
+
+    @staticmethod
+    def original_name(digest):
+        return f"originals/{digest[:2]}/{digest}"
+
+    @staticmethod
+    def thumbnail_name(digest, size):
+        return f"thumbnails/{size}/{digest[:2]}/{digest}.jpg"
+
+    def put_original(self, contents):
+        contents = strip_metadata(contents)
+        digest = hashlib.sha256(contents).hexdigest()
+        name = self.original_name(digest)
+        if not self.backend.exists(name):
+            self.backend.put(name, contents)
+        return digest
+
+    def _save_index(self):
+        self.backend.put(INDEX_NAME, json.dumps(self._index).encode("utf-8"))
+
+    def link(self, registry_key, digest):
+        """Make digest the current photo of registry_key, keeping earlier ones"""
+        with self._lock:
+            digests = [d for d in self._index.get(registry_key, []) if d != digest]
+            self._index[registry_key] = digests + [digest]
+            self._save_index()
+
+    def unlink(self, registry_keys):
+        """Drop index entries, e.g. for keys compaction removed from the registry"""
+        with self._lock:
+            removed = [key for key in registry_keys if self._index.pop(key, None) is not None]
+            if removed:
+                self._save_index()
+            return removed
+
+    def rename(self, renames):
+        """Move index entries from old to new registry keys"""
+        with self._lock:
+            for old_key, new_key in renames.items():
+                if old_key in self._index:
+                    moved = self._index.pop(old_key)
+                    kept = [d for d in self._index.get(new_key, []) if d not in moved]
+                    self._index[new_key] = kept + moved
+            self._save_index()
+
+    def digest_for(self, registry_key):
+        """Digest of the current photo of registry_key, or None"""
+        digests = self._index.get(registry_key)
+        return digests[-1] if digests else None
+
+    def digests_for(self, registry_key):
+        with self._lock:
+            return list(self._index.get(registry_key, []))
+
+    def entries(self):
+        """Snapshot of registry key -> digests, current photo last"""
+        with self._lock:
+            return {key: list(digests) for key, digests in self._index.items()}
+
+    def url_for(self, registry_key, size=None):
+        digest = self.digest_for(registry_key)
+        if digest is None:
+            return None
+        return f"/face-images/by-hash/{digest}" + (f"?size={size}" if size else "")
+
+    def make_thumbnails(self, digest):
+        original = self.backend.get(self.original_name(digest))
+        if original is None:
+            return
+        for size in THUMBNAIL_SIZES:
+            if not self.backend.exists(self.thumbnail_name(digest, size)):
+                self._make_thumbnail(digest, original, size)
+
+    def _make_thumbnail(self, digest, original, size):
+        img = ImageOps.exif_transpose(Image.open(BytesIO(original))).convert("RGB")
+        img.thumbnail((size, size))
+        out = BytesIO()
+        img.save(out, "JPEG", quality=85, optimize=True)
+        data = out.getvalue()
+        self.backend.put(self.thumbnail_name(digest, size), data)
+        return data
+
+    def read(self, digest, size=None):
+        """Image bytes for digest (a thumbnail when size is given), or None"""
+        if size is None:
+            return self.backend.get(self.original_name(digest))
+        data = self.backend.get(self.thumbnail_name(digest, size))
+        if data is None:
+            # Background generation has not run yet
+            original = self.backend.get(self.original_name(digest))
+            if original is None:
+                return None
+            data = self._make_thumbnail(digest, original, size)
+        return data
+
+    def import_legacy(self, images_path):
+        """Move pre-existing stu_<id>.jpg / staff_<id>.jpg photos into the store.
+
+        The files are removed once stored, so a person deleted later is not
+        imported again on the next start.
+        """
+        imported = 0
+        for filename in sorted(os.listdir(images_path)):
+            match = LEGACY_IMAGE_PATTERN.match(filename)
+            if not match:
+                continue
+            path = os.path.join(images_path, filename)
+            with open(path, "rb") as f:
+                try:
+                    digest = self.put_original(f.read())
+                except ValueError:
+                    # Not an image; leave the file where it is
+                    continue
+            with self._lock:
+                # An older photo than anything uploaded since, so it goes first
+                digests = self._index.get(match.group(1), [])
+                self._index[match.group(1)] = [digest] + [d for d in digests if d != digest]
+                self._save_index()
+            os.remove(path)
+            imported += 1
+        return imported
+
+
+def create_image_store(images_path):
+    if IMAGE_STORE_BACKEND == "s3":
+        backend = S3ImageBackend(S3_BUCKET, S3_ENDPOINT_URL)
+    else:
+        backend = LocalImageBackend(images_path)
+    return FaceImageStore(backend)
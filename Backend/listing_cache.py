@@ -0,0 +1,52 @@
+import threading
+from collections import defaultdict
+from uuid import uuid4
+from fastapi import Response
+
+# Versions restart at zero with the process, so ETags carry a per-boot id
+# to keep them from matching bodies served by an earlier process.
+BOOT_ID = uuid4().hex[:12]
+
+
+class ListingCache:
+    """Versioned, pre-serialized responses for rarely changing listings.
+
+    Each scope (e.g. "organizations" or "departments:<org id>") has a version
+    counter that the write endpoints bump. The counter backs a strong ETag,
+    and the serialized body is kept until the version moves on, so a repeat
+    fetch skips both the query and serialization. Counters are per process,
+    which matches the single uvicorn worker the app is deployed with.
+    """
+
+    def __init__(self):
+        self._versions = defaultdict(int)
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def bump(self, *scopes):
+        with self._lock:
+            for scope in scopes:
+                self._versions[scope] += 1
+                self._bodies.pop(scope, None)
+
+    def respond(self, request, scope, build):
+        """Serve scope with ETag/If-None-Match handling; build() returns the JSON body bytes"""
+        with self._lock:
+            version = self._versions[scope]
+            cached = self._bodies.get(scope)
+        etag = f'"{BOOT_ID}-{scope}-{version}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+
+        if cached and cached[0] == version:
+            body = cached[1]
+        else:
+            body = build()
+            with self._lock:
+                # Only keep the body if nothing was written while it was built
+                if self._versions[scope] == version:
+                    self._bodies[scope] = (version, body)
+        return Response(content=body, media_type="application/json", headers=headers)
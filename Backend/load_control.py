@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+
+# p99 latency target for /api/recognize-face
+RECOGNITION_SLO_MS = float(os.getenv("RECOGNITION_SLO_MS", 1500))
+# Requests in flight beyond which the controller degrades regardless of latency
+RECOGNITION_MAX_IN_FLIGHT = int(os.getenv("RECOGNITION_MAX_IN_FLIGHT", 8))
+# Latency percentiles cover requests finished in the last LATENCY_WINDOW_SECONDS
+LATENCY_WINDOW_SECONDS = 10.0
+LATENCY_SAMPLES = 500
+# Minimum time between tier changes, so one slow request does not flap tiers
+TIER_COOLDOWN_SECONDS = 2.0
+# Step back up once p99 falls under this fraction of the SLO
+RECOVERY_FRACTION = 0.5
+
+
+class QualityTier:
+    def __init__(self, name, detection_scale, single_face, shed):
+        self.name = name
+        self.detection_scale = detection_scale
+        self.single_face = single_face
+        self.shed = shed
+
+
+# Ordered from full quality to most degraded. Every tier encodes with the same
+# landmark model as enrollment, so distances stay comparable to the registry.
+QUALITY_TIERS = [
+    QualityTier("full", detection_scale=1.0, single_face=False, shed=False),
+    QualityTier("reduced_scale", detection_scale=0.5, single_face=False, shed=False),
+    QualityTier("single_face", detection_scale=0.5, single_face=True, shed=False),
+    QualityTier("shed", detection_scale=0.5, single_face=True, shed=True),
+]
+
+
+class DegradationController:
+    """Picks the recognition quality tier from in-flight count and recent latency.
+
+    Steps down one tier when p99 latency over the last LATENCY_WINDOW_SECONDS
+    exceeds the SLO or too many requests are in flight, and back up one tier
+    once both have recovered. In the shed tier only requests beyond
+    RECOGNITION_MAX_IN_FLIGHT are rejected, so admitted ones keep producing
+    latency samples and the controller can recover.
+    """
+
+    def __init__(self, slo_ms=RECOGNITION_SLO_MS, max_in_flight=RECOGNITION_MAX_IN_FLIGHT):
+        self.slo_ms = slo_ms
+        self.max_in_flight = max_in_flight
+        self.tier_index = 0
+        self.in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+        self.counters = {"admitted": 0, "shed": 0, "tier_changes": 0}
+        self.tier_requests = {tier.name: 0 for tier in QUALITY_TIERS}
+
+    @property
+    def tier(self):
+        return QUALITY_TIERS[self.tier_index]
+
+    def admit(self, sheddable=True):
+        """Reserve a slot and return the tier to run at, or None if the request is shed.
+
+        Callers that cannot be shed (sheddable=False) are always admitted and
+        run at the most degraded non-shed tier instead, but still count
+        towards in-flight and latency so the controller sees their load.
+        """
+        with self._lock:
+            tier = self.tier
+            if tier.shed and not sheddable:
+                tier = QUALITY_TIERS[-2]
+            elif tier.shed and self.in_flight >= self.max_in_flight:
+                self.counters["shed"] += 1
+                return None
+            self.in_flight += 1
+            self.counters["admitted"] += 1
+            self.tier_requests[tier.name] += 1
+            return tier
+
+    def release(self, latency_ms):
+        with self._lock:
+            self.in_flight -= 1
+            now = time.monotonic()
+            self._latencies.append((now, latency_ms))
+            self._adjust(now)
+
+    def _recent(self, now):
+        while self._latencies and now - self._latencies[0][0] > LATENCY_WINDOW_SECONDS:
+            self._latencies.popleft()
+        return [latency for _, latency in self._latencies]
+
+    def _adjust(self, now):
+        if now - self._last_change < TIER_COOLDOWN_SECONDS:
+            return
+        recent = self._recent(now)
+        p99 = float(np.percentile(recent, 99)) if recent else 0.0
+        overloaded = p99 > self.slo_ms or self.in_flight > self.max_in_flight
+        recovered = p99 < self.slo_ms * RECOVERY_FRACTION and self.in_flight <= self.max_in_flight // 2
+        if overloaded and self.tier_index < len(QUALITY_TIERS) - 1:
+            self.tier_index += 1
+        elif recovered and self.tier_index > 0:
+            self.tier_index -= 1
+        else:
+            return
+        self._last_change = now
+        self.counters["tier_changes"] += 1
+        # Samples from the old tier no longer describe the new one
+        self._latencies.clear()
+
+    def snapshot(self):
+        with self._lock:
+            latencies = self._recent(time.monotonic())
+            return {
+                "tier": self.tier.name,
+                "tier_index": self.tier_index,
+                "in_flight": self.in_flight,
+                "slo_ms": self.slo_ms,
+                "p50_ms": round(float(np.percentile(latencies, 50)), 1) if latencies else None,
+                "p99_ms": round(float(np.percentile(latencies, 99)), 1) if latencies else None,
+                "tier_requests": dict(self.tier_requests),
+                **self.counters,
+            }
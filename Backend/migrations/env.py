@@ -0,0 +1,62 @@
+from logging.config import fileConfig
+from alembic import context
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from models.base import Base, engine
+from models.login import Login
+from models.class_model import Class
+from models.student import Student
+from models.organization import Organization
+from models.department import Department
+from models.staff import Staff
+from models.students_login import Students_Login
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Revision matching the schema the app used to create with Base.metadata.create_all
+CREATE_ALL_REVISION = "0001"
+
+
+def run_migrations_offline():
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def stamp_create_all_database(connection):
+    """Mark a database created by create_all as being at CREATE_ALL_REVISION.
+
+    Such databases have the tables but no alembic_version, so upgrading them
+    from scratch would fail on the first CREATE TABLE.
+    """
+    migration_context = MigrationContext.configure(connection)
+    tables = set(inspect(connection).get_table_names())
+    if (migration_context.get_current_revision() is None
+            and tables.intersection(table.name for table in target_metadata.sorted_tables)):
+        migration_context.stamp(ScriptDirectory.from_config(config), CREATE_ALL_REVISION)
+    # End the transaction the checks opened, so the migrations run in their own
+    connection.commit()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        stamp_create_all_database(connection)
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,113 @@
+"""Initial schema, as previously created by Base.metadata.create_all
+
+Databases that were already created by the app at startup are stamped at
+this revision automatically by env.py, so `alembic upgrade head` only applies
+the later revisions to them.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'login',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('name', sa.Text(), nullable=False),
+        sa.Column('email', sa.Text(), nullable=False, unique=True),
+        sa.Column('password', sa.Text(), nullable=False),
+    )
+    op.create_table(
+        'students_login',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('name', sa.Text(), nullable=False),
+        sa.Column('reg_no', sa.Text(), nullable=False, unique=True),
+        sa.Column('password', sa.Text(), nullable=False),
+    )
+    op.create_table(
+        'organizations',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('name', sa.Text(), nullable=False),
+        sa.Column('address', sa.Text()),
+        sa.Column('contact', sa.Text()),
+        sa.Column('created_at', sa.DateTime(timezone=True)),
+    )
+    op.create_table(
+        'departments',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('name', sa.Text(), nullable=False),
+        sa.Column('code', sa.Text(), unique=True),
+        sa.Column('description', sa.Text()),
+        sa.Column('head_of_department', sa.Text()),
+        sa.Column('organization_id', UUID(as_uuid=True), sa.ForeignKey('organizations.id')),
+        sa.Column('created_at', sa.Date()),
+    )
+    op.create_table(
+        'classes',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('name', sa.Text()),
+        sa.Column('code', sa.Text(), unique=True),
+        sa.Column('department_id', UUID(as_uuid=True), sa.ForeignKey('departments.id')),
+        sa.Column('semester', sa.Text()),
+        sa.Column('section', sa.Text()),
+        sa.Column('academic_year', sa.Text()),
+        sa.Column('capacity', sa.Integer()),
+        sa.Column('description', sa.Text()),
+        sa.Column('organization_id', UUID(as_uuid=True), sa.ForeignKey('organizations.id')),
+        sa.Column('created_at', sa.Date()),
+    )
+    op.create_table(
+        'staff',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('organization_id', UUID(as_uuid=True), sa.ForeignKey('organizations.id')),
+        sa.Column('department_id', UUID(as_uuid=True), sa.ForeignKey('departments.id')),
+        sa.Column('employee_id', sa.Text(), unique=True),
+        sa.Column('full_name', sa.Text(), nullable=False),
+        sa.Column('email', sa.Text(), unique=True),
+        sa.Column('phone', sa.Text()),
+        sa.Column('role', sa.Text()),
+        sa.Column('designation', sa.Text()),
+        sa.Column('qualification', sa.Text()),
+        sa.Column('experience', sa.Numeric()),
+        sa.Column('address', sa.Text()),
+        sa.Column('date_of_birth', sa.Date()),
+        sa.Column('gender', sa.Text()),
+        sa.Column('joining_date', sa.Date()),
+        sa.Column('created_at', sa.Date()),
+    )
+    op.create_table(
+        'students',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('roll_number', sa.Text(), nullable=False),
+        sa.Column('full_name', sa.Text(), nullable=False),
+        sa.Column('email', sa.Text(), nullable=False, unique=True),
+        sa.Column('phone', sa.Text()),
+        sa.Column('address', sa.Text()),
+        sa.Column('course', sa.Text()),
+        sa.Column('semester', sa.Text()),
+        sa.Column('gender', sa.Text()),
+        sa.Column('date_of_birth', sa.Date()),
+        sa.Column('department_id', UUID(as_uuid=True), sa.ForeignKey('departments.id')),
+        sa.Column('class_id', UUID(as_uuid=True), sa.ForeignKey('classes.id')),
+        sa.Column('organization_id', UUID(as_uuid=True), sa.ForeignKey('organizations.id')),
+        sa.Column('created_at', sa.Date()),
+    )
+
+
+def downgrade():
+    op.drop_table('students')
+    op.drop_table('staff')
+    op.drop_table('classes')
+    op.drop_table('departments')
+    op.drop_table('organizations')
+    op.drop_table('students_login')
+    op.drop_table('login')
@@ -0,0 +1,33 @@
+"""Indexes for the org-scoped list queries, dashboard counts and roll lookups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # get_students_by_org and the org/department dashboard counts
+    op.create_index('ix_students_organization_id_department_id', 'students', ['organization_id', 'department_id'])
+    # per-department student counts in get_dashboard_data
+    op.create_index('ix_students_department_id', 'students', ['department_id'])
+    # get_student_by_roll and the recognition profile lookups
+    op.create_index('ix_students_roll_number', 'students', ['roll_number'])
+    op.create_index('ix_staff_organization_id', 'staff', ['organization_id'])
+    op.create_index('ix_departments_organization_id', 'departments', ['organization_id'])
+    op.create_index('ix_classes_organization_id', 'classes', ['organization_id'])
+
+
+def downgrade():
+    op.drop_index('ix_classes_organization_id', table_name='classes')
+    op.drop_index('ix_departments_organization_id', table_name='departments')
+    op.drop_index('ix_staff_organization_id', table_name='staff')
+    op.drop_index('ix_students_roll_number', table_name='students')
+    op.drop_index('ix_students_department_id', table_name='students')
+    op.drop_index('ix_students_organization_id_department_id', table_name='students')
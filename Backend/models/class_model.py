@@ -15,5 +15,5 @@ class Class(Base):
     academic_year = Column(Text)
     capacity = Column(Integer)
     description = Column(Text)
-    organization_id = Column(PGUUID(as_uuid=True), ForeignKey('organizations.id'))
+    organization_id = Column(PGUUID(as_uuid=True), ForeignKey('organizations.id'), index=True)
     created_at = Column(Date)
\ No newline at end of file
@@ -11,5 +11,5 @@ class Department(Base):
     code = Column(Text, unique=True)
     description = Column(Text)
     head_of_department = Column(Text)
-    organization_id = Column(PGUUID(as_uuid=True), ForeignKey('organizations.id'))
+    organization_id = Column(PGUUID(as_uuid=True), ForeignKey('organizations.id'), index=True)
     created_at = Column(Date)
\ No newline at end of file
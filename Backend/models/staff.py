@@ -7,7 +7,7 @@ class Staff(Base):
     __tablename__ = 'staff'
 
     id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    organization_id = Column(PGUUID(as_uuid=True), ForeignKey('organizations.id'))
+    organization_id = Column(PGUUID(as_uuid=True), ForeignKey('organizations.id'), index=True)
     department_id = Column(PGUUID(as_uuid=True), ForeignKey('departments.id'))
     employee_id = Column(Text, unique=True)
     full_name = Column(Text, nullable=False)
@@ -1,12 +1,16 @@
-from sqlalchemy import Column, String, Text, Date, ForeignKey, UUID
+from sqlalchemy import Column, String, Text, Date, ForeignKey, Index, UUID
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 import uuid
 from models.base import Base
 
 class Student(Base):
     __tablename__ = 'students'
+    __table_args__ = (
+        Index('ix_students_organization_id_department_id', 'organization_id', 'department_id'),
+    )
+
     id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    roll_number = Column(Text,nullable=False)
+    roll_number = Column(Text, nullable=False, index=True)
     full_name = Column(Text, nullable=False)
     email = Column(Text, nullable=False, unique=True)
     phone = Column(Text)
@@ -15,7 +19,7 @@ class Student(Base):
     semester = Column(Text)
     gender = Column(Text)
     date_of_birth = Column(Date)
-    department_id = Column(PGUUID(as_uuid=True), ForeignKey('departments.id'))
+    department_id = Column(PGUUID(as_uuid=True), ForeignKey('departments.id'), index=True)
     class_id = Column(PGUUID(as_uuid=True), ForeignKey('classes.id'))
     organization_id = Column(PGUUID(as_uuid=True), ForeignKey('organizations.id'))
     created_at = Column(Date)
\ No newline at end of file
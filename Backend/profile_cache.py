@@ -0,0 +1,134 @@
+import threading
+from models.student import Student
+from models.staff import Staff
+from face_gallery import split_identity, STUDENT_PREFIX, STAFF_PREFIX
+
+# Keep IN (...) lists well below driver parameter limits while warming
+WARM_BATCH_SIZE = 500
+
+
+def student_profile(student):
+    return {
+        "id": student.roll_number,
+        "name": student.full_name,
+        "type": "student",
+        "department": student.course,
+        "class": student.semester,
+        "gender": student.gender,
+        "email": student.email,
+        "phone": student.phone,
+        "dob": student.date_of_birth,
+        "address": student.address,
+    }
+
+
+def staff_profile(staff):
+    return {
+        "id": staff.employee_id,
+        "name": staff.full_name,
+        "type": "staff",
+        "designation": staff.designation,
+        "role": staff.role,
+        "gender": staff.gender,
+        "email": staff.email,
+        "phone": staff.phone,
+        "dob": staff.date_of_birth,
+        "address": staff.address,
+    }
+
+
+def student_key(roll_number):
+    return f"{STUDENT_PREFIX}{roll_number}"
+
+
+def staff_key(employee_id):
+    return f"{STAFF_PREFIX}{employee_id}"
+
+
+class IdentityProfileCache:
+    """Profiles for recognized faces, keyed by (id_type, id) so every photo
+    slot of a person shares one entry.
+
+    Identities with no matching DB row are cached as None so repeated
+    recognitions of an orphaned registry entry do not hit the database.
+
+    Entries never expire, so a profile read from the database is only stored
+    if no invalidate() or clear() for that identity happened since the read
+    started; otherwise a pre-update row could be cached forever.
+    """
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+        self._profiles = {}
+        self._lock = threading.Lock()
+        # Bumped per identity by invalidate() and for everyone by clear()
+        self._generations = {}
+        self._epoch = 0
+
+    def _generation(self, identity):
+        return self._epoch, self._generations.get(identity, 0)
+
+    def _store(self, profiles, generations):
+        """Cache profiles whose identity was not invalidated since generations were taken"""
+        with self._lock:
+            for identity, profile in profiles.items():
+                if self._generation(identity) == generations[identity]:
+                    self._profiles[identity] = profile
+
+    def warm(self, registry_keys):
+        """Load profiles for every identity in the gallery in a few batched queries"""
+        identities = {split_identity(key) for key in registry_keys}
+        roll_numbers = [id_ for id_type, id_ in identities if id_type == "student"]
+        employee_ids = [id_ for id_type, id_ in identities if id_type == "staff"]
+
+        profiles = dict.fromkeys(identities)
+        with self._lock:
+            generations = {identity: self._generation(identity) for identity in identities}
+        db = self._session_factory()
+        try:
+            for start in range(0, len(roll_numbers), WARM_BATCH_SIZE):
+                batch = roll_numbers[start:start + WARM_BATCH_SIZE]
+                for student in db.query(Student).filter(Student.roll_number.in_(batch)):
+                    profiles["student", student.roll_number] = student_profile(student)
+            for start in range(0, len(employee_ids), WARM_BATCH_SIZE):
+                batch = employee_ids[start:start + WARM_BATCH_SIZE]
+                for staff in db.query(Staff).filter(Staff.employee_id.in_(batch)):
+                    profiles["staff", staff.employee_id] = staff_profile(staff)
+        finally:
+            db.close()
+        self._store(profiles, generations)
+        return sum(1 for profile in profiles.values() if profile)
+
+    def get(self, registry_key):
+        identity = split_identity(registry_key)
+        if identity in self._profiles:
+            return self._profiles[identity]
+
+        id_type, id_ = identity
+        with self._lock:
+            generation = self._generation(identity)
+        profile = None
+        db = self._session_factory()
+        try:
+            if id_type == "student":
+                student = db.query(Student).filter(Student.roll_number == id_).first()
+                profile = student_profile(student) if student else None
+            elif id_type == "staff":
+                staff = db.query(Staff).filter(Staff.employee_id == id_).first()
+                profile = staff_profile(staff) if staff else None
+        finally:
+            db.close()
+        self._store({identity: profile}, {identity: generation})
+        return profile
+
+    def invalidate(self, *registry_keys):
+        with self._lock:
+            for registry_key in registry_keys:
+                identity = split_identity(registry_key)
+                self._profiles.pop(identity, None)
+                self._generations[identity] = self._generations.get(identity, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+            self._epoch += 1
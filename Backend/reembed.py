@@ -0,0 +1,139 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import cv2
+import numpy as np
+import face_recognition
+
+from face_gallery import write_registry
+from face_prototypes import compress_encodings
+from image_store import create_image_store
+
+REEMBED_WORKERS = int(os.getenv("REEMBED_WORKERS", os.cpu_count() or 1))
+# Progress is flushed to the checkpoint every this many images
+CHECKPOINT_EVERY = 50
+CHECKPOINT_NAME = ".reembed_checkpoint.json"
+# Images read ahead per worker, so the whole gallery is never in memory at once
+READ_AHEAD_PER_WORKER = 4
+# Checkpoints written under different encoder settings are discarded on resume
+ENCODER_SETTINGS = {"detector": "hog+cnn", "num_jitters": 1}
+
+
+def encode_face_bytes(contents):
+    """Encode the first face in an image, or return None if there is none"""
+    img = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    face_locations = face_recognition.face_locations(rgb_img, model="hog")
+    if not face_locations:
+        face_locations = face_recognition.face_locations(rgb_img, model="cnn")
+    if not face_locations:
+        return None
+    face_encodings = face_recognition.face_encodings(
+        rgb_img, face_locations, num_jitters=ENCODER_SETTINGS["num_jitters"])
+    return face_encodings[0].tolist() if face_encodings else None
+
+
+def _load_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            checkpoint = json.load(f)
+    except json.JSONDecodeError:
+        return {}
+    if checkpoint.get("settings") != ENCODER_SETTINGS:
+        return {}
+    return checkpoint.get("done", {})
+
+
+def _save_checkpoint(path, done):
+    write_registry(path, {"settings": ENCODER_SETTINGS, "done": done})
+
+
+def rebuild_registry(image_store, checkpoint_dir, workers=REEMBED_WORKERS, progress=None):
+    """Re-encode every stored face image into a fresh registry dict.
+
+    Encodings are computed across a process pool and checkpointed by image
+    digest in checkpoint_dir, so an interrupted rebuild resumes where it
+    stopped and identical photos are encoded once. Every photo in a key's
+    history is encoded and the results are compressed to prototypes, the same
+    way live enrollments accumulate. The checkpoint is removed once the
+    rebuild completes. progress, if given, is called as
+    progress(done_count, total). Returns (registry, digests used per key,
+    keys where no photo has a face).
+    """
+    images = image_store.entries()
+    checkpoint_path = os.path.join(checkpoint_dir, CHECKPOINT_NAME)
+    done = _load_checkpoint(checkpoint_path)
+    pending = sorted({digest for digests in images.values() for digest in digests if digest not in done})
+    total = len(done) + len(pending)
+    if progress:
+        progress(len(done), total)
+
+    if pending:
+        workers = max(1, min(workers, len(pending)))
+        queue = iter(pending)
+        running = {}
+        completed = 0
+        # spawn keeps workers independent of the server's threads and DB connections
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            while True:
+                while len(running) < workers * READ_AHEAD_PER_WORKER:
+                    digest = next(queue, None)
+                    if digest is None:
+                        break
+                    contents = image_store.read(digest)
+                    if contents is None:
+                        done[digest] = None
+                        continue
+                    running[pool.submit(encode_face_bytes, contents)] = digest
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done[running.pop(future)] = future.result()
+                    completed += 1
+                    if completed % CHECKPOINT_EVERY == 0:
+                        _save_checkpoint(checkpoint_path, done)
+                        if progress:
+                            progress(len(done), total)
+        _save_checkpoint(checkpoint_path, done)
+
+    registry = {}
+    for key, digests in images.items():
+        encodings = [done[digest] for digest in digests if done.get(digest) is not None]
+        if encodings:
+            registry[key] = compress_encodings(encodings)
+    failed = sorted(key for key in images if key not in registry)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    if progress:
+        progress(len(done), total)
+    return registry, images, failed
+
+
+if __name__ == "__main__":
+    # Offline rebuild; restart the server afterwards to load the new registry.
+    # A running server can instead rebuild in place via POST /api/face-registry/rebuild.
+    parser = argparse.ArgumentParser(description="Rebuild face_registry.json from stored face images")
+    parser.add_argument("--images-path", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "face-images"))
+    parser.add_argument("--workers", type=int, default=REEMBED_WORKERS)
+    args = parser.parse_args()
+
+    image_store = create_image_store(args.images_path)
+    image_store.import_legacy(args.images_path)
+    started = time.perf_counter()
+    registry, _, failed = rebuild_registry(
+        image_store, args.images_path, args.workers,
+        progress=lambda done, total: print(f"{done}/{total} images encoded", flush=True))
+    write_registry(os.path.join(args.images_path, "face_registry.json"), registry)
+    print(f"Rebuilt {len(registry)} identities in {time.perf_counter() - started:.1f}s")
+    if failed:
+        print(f"No face found in {len(failed)} images: {', '.join(failed)}")
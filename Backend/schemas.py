@@ -0,0 +1,60 @@
+"""Response schemas shared by app.py and the offline benchmarks.
+
+Importing this module has no side effects beyond defining models, unlike
+app.py, which opens the face registry and starts camera workers on import.
+"""
+from datetime import date
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel
+from fast_json import columns_for
+from models.student import Student
+from models.staff import Staff
+
+
+class StudentOut(BaseModel):
+    id: UUID
+    roll_number: str
+    full_name: str
+    email: str
+    phone: Optional[str]
+    department_id: Optional[UUID]
+    class_id: Optional[UUID]
+    semester: Optional[str]
+    course: Optional[str]
+    address: Optional[str]
+    date_of_birth: Optional[date]
+    gender: Optional[str]
+    created_at: Optional[date]
+    organization_id: UUID
+
+    class Config:
+        orm_mode = True
+
+
+class StaffBase(BaseModel):
+    employee_id: str
+    full_name: str
+    email: str
+    phone: Optional[str] = None
+    department_id: Optional[UUID] = None
+    role: Optional[str] = None
+    designation: Optional[str] = None
+    qualification: Optional[str] = None
+    experience: Optional[float] = None
+    address: Optional[str] = None
+    date_of_birth: Optional[date] = None
+    gender: Optional[str] = None
+    joining_date: Optional[date] = None
+    organization_id: UUID
+
+
+class StaffOut(StaffBase):
+    id: UUID
+    class Config:
+        orm_mode = True
+
+
+# Columns selected by the large list endpoints, serialized without ORM objects
+student_out_columns = columns_for(Student, StudentOut)
+staff_out_columns = columns_for(Staff, StaffOut)
@@ -0,0 +1,185 @@
+import math
+import multiprocessing
+import os
+import sys
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import face_recognition
+
+from face_gallery import FaceGallery, identity_of, split_identity, reported_identifier, FACE_MATCH_TOLERANCE
+
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", os.cpu_count() or 1))
+# Length of video each worker decodes independently
+VIDEO_CHUNK_SECONDS = 60
+# A frame is sampled when its thumbnail differs from the last sampled one by
+# at least this mean absolute grey level, or when MAX_SAMPLE_INTERVAL passes.
+SCENE_CHANGE_THRESHOLD = 12.0
+MIN_SAMPLE_INTERVAL = 0.25
+MAX_SAMPLE_INTERVAL = 2.0
+THUMBNAIL_SIZE = (64, 36)
+# Frames are downscaled before HOG detection; lecture recordings are usually
+# 720p or larger so faces survive the halving.
+DETECTION_SCALE = 0.5
+# Sightings closer together than this are joined into one presence interval
+PRESENCE_MERGE_GAP = 2 * MAX_SAMPLE_INTERVAL
+
+_worker_gallery = None
+
+
+def _init_worker(registry):
+    global _worker_gallery
+    _worker_gallery = FaceGallery(registry)
+
+
+def _thumbnail(frame):
+    small = cv2.resize(frame, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+
+def _recognize_frame(frame, tolerance):
+    """Run detect -> encode -> match on one BGR frame"""
+    small = cv2.resize(frame, (0, 0), fx=DETECTION_SCALE, fy=DETECTION_SCALE)
+    rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    locations = face_recognition.face_locations(rgb, model="hog")
+    if not locations:
+        return []
+    # Photo slots of one person count as one identity; keep its best match
+    matches = {}
+    for encoding in face_recognition.face_encodings(rgb, locations):
+        key, distance = _worker_gallery.nearest(encoding)
+        if key and distance <= tolerance:
+            identity = identity_of(key)
+            matches[identity] = min(distance, matches.get(identity, distance))
+    return list(matches.items())
+
+
+def _process_chunk(path, start_frame, end_frame, fps, tolerance):
+    """Decode frames [start_frame, end_frame) one at a time and match sampled ones"""
+    cap = cv2.VideoCapture(path)
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    sightings = []
+    frames_sampled = 0
+    last_thumb = None
+    last_sample_time = -math.inf
+    frame_idx = start_frame
+    while frame_idx < end_frame and cap.grab():
+        timestamp = frame_idx / fps
+        frame_idx += 1
+        elapsed = timestamp - last_sample_time
+        if elapsed < MIN_SAMPLE_INTERVAL:
+            continue
+        ok, frame = cap.retrieve()
+        if not ok:
+            continue
+        thumb = _thumbnail(frame)
+        scene_changed = last_thumb is None or np.mean(np.abs(thumb - last_thumb)) >= SCENE_CHANGE_THRESHOLD
+        if not scene_changed and elapsed < MAX_SAMPLE_INTERVAL:
+            continue
+        last_thumb = thumb
+        last_sample_time = timestamp
+        frames_sampled += 1
+        for key, distance in _recognize_frame(frame, tolerance):
+            sightings.append((key, timestamp, distance))
+    cap.release()
+
+    return {
+        "sightings": sightings,
+        "frames_decoded": frame_idx - start_frame,
+        "frames_sampled": frames_sampled,
+    }
+
+
+def build_timeline(sightings, merge_gap=PRESENCE_MERGE_GAP):
+    """Group (identity, timestamp, distance) sightings into presence intervals per identity.
+
+    Entries carry the same id_type and identifier as /api/recognize-face.
+    """
+    timeline = {}
+    for key, timestamp, distance in sorted(sightings, key=lambda s: (s[0], s[1])):
+        confidence = round(1 - distance, 2)
+        intervals = timeline.setdefault(key, [])
+        if intervals and timestamp - intervals[-1]["end"] <= merge_gap:
+            intervals[-1]["end"] = round(timestamp, 2)
+            intervals[-1]["sightings"] += 1
+            intervals[-1]["confidence"] = max(intervals[-1]["confidence"], confidence)
+        else:
+            intervals.append({
+                "start": round(timestamp, 2),
+                "end": round(timestamp, 2),
+                "sightings": 1,
+                "confidence": confidence,
+            })
+    return {
+        key: {
+            "id_type": split_identity(key)[0],
+            "identifier": reported_identifier(key),
+            "intervals": intervals,
+            "first_seen": intervals[0]["start"],
+            "last_seen": intervals[-1]["end"],
+            "present_seconds": round(sum(i["end"] - i["start"] for i in intervals), 2),
+        }
+        for key, intervals in timeline.items()
+    }
+
+
+def process_video(path, registry, workers=VIDEO_WORKERS, tolerance=FACE_MATCH_TOLERANCE):
+    """Build a per-identity presence timeline for a recorded video.
+
+    The video is split into VIDEO_CHUNK_SECONDS chunks that are decoded and
+    matched in parallel worker processes; each worker streams its own
+    VideoCapture, so no more than one frame per worker is held in memory.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError("Could not open video")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    started = time.perf_counter()
+    if total_frames > 0:
+        chunk_frames = max(1, int(VIDEO_CHUNK_SECONDS * fps))
+        chunks = [(start, min(start + chunk_frames, total_frames))
+                  for start in range(0, total_frames, chunk_frames)]
+    else:
+        # Frame count unknown (some containers): decode sequentially to the end
+        chunks = [(0, math.inf)]
+
+    workers = max(1, min(workers, len(chunks)))
+    # spawn keeps workers independent of the server's threads
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker,
+                             initargs=(registry,)) as pool:
+        futures = [pool.submit(_process_chunk, path, start, end, fps, tolerance)
+                   for start, end in chunks]
+        results = [future.result() for future in futures]
+
+    wall_seconds = time.perf_counter() - started
+    frames_decoded = sum(r["frames_decoded"] for r in results)
+    video_seconds = frames_decoded / fps
+    sightings = [s for r in results for s in r["sightings"]]
+
+    return {
+        "video_seconds": round(video_seconds, 2),
+        "wall_seconds": round(wall_seconds, 2),
+        "video_seconds_per_second": round(video_seconds / wall_seconds, 2) if wall_seconds else None,
+        "frames_decoded": frames_decoded,
+        "frames_sampled": sum(r["frames_sampled"] for r in results),
+        "workers": workers,
+        "timeline": build_timeline(sightings),
+    }
+
+
+if __name__ == "__main__":
+    # python video_ingest.py lecture.mp4 [face_registry.json]
+    registry_path = sys.argv[2] if len(sys.argv) > 2 else "face-images/face_registry.json"
+    with open(registry_path, "r") as f:
+        registry = json.load(f)
+    print(json.dumps(process_video(sys.argv[1], registry), indent=2))
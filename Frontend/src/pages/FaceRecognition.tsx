@@ -24,11 +24,10 @@ const FaceRecognition: React.FC = () => {
         const response = await fetch(`${baseURL}/api/recognize-face`, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({ image: imageSrc })
+          body: JSON.stringify({ image: imageSrc, include_profile: true })
         });
         
         const data = await response.json();
-        data.identifier = data.identifier.slice(0, -2);
         if (!response.ok) {
           throw new Error(data.message || 'Recognition failed');
         }
@@ -47,11 +46,13 @@ const FaceRecognition: React.FC = () => {
             
            case 'recognized': {
             try {
-                const { data: student } = await api.get(`/students/by-roll/${data.identifier}`);
+                const student = data.profile
+                  ?? (await api.get(`/students/by-roll/${data.identifier}`)).data;
+                const photoPath = data.thumbnail_url ?? data.image_url;
 
                 setRecognitionResult({
                 ...student,
-                photo: data.image_url,
+                photo: photoPath ? `${baseURL}${photoPath}` : null,
                 confidence: data.confidence ?? 1,
                 });
 
@@ -193,11 +194,17 @@ const FaceRecognition: React.FC = () => {
               </div>
 
               <div className="flex items-start space-x-4">
-                <img
-                  src={recognitionResult.photo}
-                  alt={recognitionResult.name}
-                  className="w-20 h-20 rounded-lg object-cover"
-                />
+                {recognitionResult.photo ? (
+                  <img
+                    src={recognitionResult.photo}
+                    alt={recognitionResult.name}
+                    className="w-20 h-20 rounded-lg object-cover"
+                  />
+                ) : (
+                  <div className="w-20 h-20 rounded-lg bg-gray-200 flex items-center justify-center">
+                    <User className="w-8 h-8 text-gray-400" />
+                  </div>
+                )}
                 <div className="flex-1">
                   <h4 className="text-xl font-semibold text-gray-900">{recognitionResult.name}</h4>
                   <p className="text-gray-600 capitalize">{recognitionResult.type}</p>
@@ -104,7 +104,8 @@ const Students: React.FC = () => {
 
     const formDataObj = new FormData();
     formDataObj.append('face', face.file);
-    formDataObj.append('identifier', formData.roll_number+'-'+index);
+    formDataObj.append('identifier', formData.roll_number);
+    formDataObj.append('slot', String(index));
     formDataObj.append('id_type', 'student');
 
     try {